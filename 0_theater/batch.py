@@ -0,0 +1,98 @@
+# batch.py
+#
+# The theater owner was so happy with the answer that he told all of
+# his friends.  Now there are tens of thousands of theaters, each with
+# its own base price, attendance figures and costs.  Calling
+# best_price() once per theater is far too slow.
+#
+# The functions here evaluate the whole profit grid for many theaters
+# at once using NumPy array math.  Each scenario is one row, each
+# candidate price is one column.
+
+import numpy as np
+
+def best_prices(base_price, base_attendance, attendace_change, price_change,
+                fixed_cost, variable_cost_per_attendee,
+                start_price=0.10, end_price=10.00, chunk_size=None):
+    '''
+    Return an array with the best ticket price for every scenario.
+
+    All arguments may be scalars or 1-D arrays (they are broadcast
+    against each other).  The grid for each scenario is the same one
+    scanned by theater.best_price(): start_price, start_price + price_change,
+    ... up to the first price reaching end_price.  Ties go to the lower
+    price, although with float arithmetic two nearly equal profits may
+    not compare the same way as they do with Decimal.
+
+    Scenarios are processed chunk_size rows at a time to keep the size
+    of the temporary profit matrix bounded.
+    '''
+    (base_price, base_attendance, attendace_change, price_change,
+     fixed_cost, variable_cost_per_attendee, start_price, end_price) = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in (
+            base_price, base_attendance, attendace_change, price_change,
+            fixed_cost, variable_cost_per_attendee, start_price, end_price)))
+
+    # Number of grid points for each scenario (same rule as theater.grid_size).
+    # The small tolerance keeps 99.00000000000001 steps from becoming 100.
+    steps = (end_price - start_price) / price_change
+    sizes = np.maximum(np.ceil(steps - 1e-9), 0).astype(np.int64) + 1
+    width = int(sizes.max())
+    k = np.arange(width, dtype=np.float64)
+
+    if chunk_size is None:
+        chunk_size = max(1, 1_000_000 // width)
+
+    result = np.empty(len(sizes), dtype=np.float64)
+    for lo in range(0, len(sizes), chunk_size):
+        rows = slice(lo, lo + chunk_size)
+        col = lambda x: x[rows, np.newaxis]
+        prices = col(start_price) + k * col(price_change)
+        attendees = col(base_attendance) + (col(base_price) - prices) / col(price_change) * col(attendace_change)
+        profit = prices * attendees - (col(fixed_cost) + col(variable_cost_per_attendee) * attendees)
+        # Grid points past the end of a shorter grid never win
+        profit[k >= col(sizes)] = -np.inf
+        best = np.argmax(profit, axis=1)
+        result[rows] = start_price[rows] + best * price_change[rows]
+    return result
+
+def test_best_prices():
+    import random
+    from decimal import Decimal
+    from theater import best_price
+
+    assert np.allclose(best_prices(5.0, 120, 15, 0.1, 180, 0.04), [2.90])
+
+    random.seed(0)
+    scenarios = [(random.randint(300, 900) / 100, random.randint(50, 400), random.randint(5, 40),
+                  0.1, random.randint(0, 500), random.randint(0, 200) / 100)
+                 for _ in range(200)]
+    columns = [np.array(column) for column in zip(*scenarios)]
+    prices = best_prices(*columns)
+    for scenario, price in zip(scenarios, prices):
+        expected = best_price(*(Decimal(str(x)) for x in scenario))
+        assert abs(price - float(expected)) < 1e-9, (scenario, price, expected)
+    print('Good batch prices')
+
+def benchmark(n=10_000):
+    import random
+    import time
+    from decimal import Decimal
+    from theater import best_price
+
+    columns = [np.full(n, 5.0), np.random.randint(50, 400, n), np.random.randint(5, 40, n),
+               np.full(n, 0.1), np.random.randint(0, 500, n), np.random.randint(0, 200, n) / 100]
+    start = time.perf_counter()
+    best_prices(*columns)
+    vectorized = time.perf_counter() - start
+
+    sample = random.sample(range(n), min(n, 100))
+    start = time.perf_counter()
+    for i in sample:
+        best_price(*(Decimal(str(column[i])) for column in columns))
+    scan = (time.perf_counter() - start) * n / len(sample)
+    print(f'{n} scenarios: vectorized {vectorized:.3f}s, Decimal scan (estimated) {scan:.3f}s')
+
+if __name__ == '__main__':
+    test_best_prices()
+    benchmark()
@@ -25,42 +25,387 @@
 #
 # Credit: This problem comes from "How to Design Programs", 2nd Ed.
 from decimal import *
+import math
 
-def best_price(): 
-    base_price = Decimal('5.0')
-    base_attendance = Decimal('120')
-    attendace_change = Decimal('15')
-    price_change = Decimal('0.1')
-
-    fixed_cost = Decimal('180')
-    variable_cost_per_attendee = Decimal('0.04')
-    start_price = Decimal('0.10')
-    end_price = Decimal('10.00')
-
+def make_profit(base_price, base_attendance, attendace_change, price_change,
+                fixed_cost, variable_cost_per_attendee):
+    '''
+    Return a profit(price) function for the given model parameters.
+    '''
     # profit = revenuse - cost
-    def revenue(price: float, attendees: int): 
+    def revenue(price, attendees):
         return price * attendees
-    
-    def cost(attendees: int): 
+
+    def cost(attendees):
         return fixed_cost + variable_cost_per_attendee * attendees
 
-    def profit(price: float):
+    def profit(price):
         attendees = base_attendance + (base_price - price) / price_change * attendace_change
         return revenue(price, attendees) - cost(attendees)
 
-    # so how do we iterate through prices?
-    price = start_price
-    best_price = price
-    best_profit = profit(price)
+    return profit
+
+class PriceGrid:
+    '''
+    The prices start, start + step, start + 2*step, ... computed on demand
+    so that the search methods don't have to build the whole list.
+    '''
+    def __init__(self, start, step, size):
+        self.start = start
+        self.step = step
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, stride = index.indices(self.size)
+            assert stride == 1
+            return PriceGrid(self.start + start * self.step, self.step, max(stop - start, 0))
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return self.start + index * self.step
 
-    while price < end_price:
-        price += price_change
-        current_profit = profit(price)
-        if(current_profit > best_profit):
+def grid_size(start_price, end_price, price_change):
+    '''
+    Number of prices visited by the scan: start_price, start_price + price_change,
+    ... up to the first price that reaches end_price.
+    '''
+    steps = (end_price - start_price) / price_change
+    return max(int(steps.to_integral_value(rounding=ROUND_CEILING)), 0) + 1
+
+def scan_index(profit, prices):
+    '''
+    Linear scan.  Returns the index of the first price with the largest profit.
+    '''
+    best = 0
+    best_profit = profit(prices[0])
+    for k in range(1, len(prices)):
+        current_profit = profit(prices[k])
+        if current_profit > best_profit:
             best_profit = current_profit
-            best_price = price
-    return best_price
-    
-print(f"Best price is ${best_price()}")
+            best = k
+    return best
+
+def ternary_index(profit, prices):
+    '''
+    Ternary search over the price grid.  Assumes profit rises strictly and
+    then falls strictly (a tie between the two top grid points is fine).
+    Returns the same index as scan_index() in O(log n) evaluations.
+    '''
+    lo, hi = 0, len(prices) - 1
+    while hi - lo > 2:
+        third = (hi - lo) // 3
+        m1, m2 = lo + third, hi - third
+        if profit(prices[m1]) < profit(prices[m2]):
+            lo = m1 + 1
+        else:
+            hi = m2 - 1
+    return lo + scan_index(profit, prices[lo:hi+1])
+
+def quadratic_index(a, b, c, prices):
+    '''
+    Index of the grid price maximizing a*p**2 + b*p + c.  Only the grid
+    points on either side of the vertex (or the two endpoints if the curve
+    doesn't open downward) need to be checked.
+    '''
+    def f(p):
+        return (a * p + b) * p + c
+
+    last = len(prices) - 1
+    if a < 0:
+        # One extra point on each side in case the vertex was rounded (float, int)
+        k = math.floor((-b / (2 * a) - prices.start) / prices.step)
+        candidates = sorted({min(max(i, 0), last) for i in range(k - 1, k + 3)})
+    else:
+        candidates = [0, last]
+    best = candidates[0]
+    for k in candidates[1:]:
+        if f(prices[k]) > f(prices[best]):
+            best = k
+    return best
+
+def profit_coefficients(base_price, base_attendance, attendace_change, price_change,
+                        fixed_cost, variable_cost_per_attendee):
+    '''
+    Expand profit(price) into the coefficients (a, b, c) of a*p**2 + b*p + c.
+    '''
+    # attendees = alpha - beta * price
+    beta = attendace_change / price_change
+    alpha = base_attendance + base_price * beta
+    # profit = (price - variable_cost) * attendees - fixed_cost
+    return (-beta,
+            alpha + beta * variable_cost_per_attendee,
+            -alpha * variable_cost_per_attendee - fixed_cost)
+
+def decimal_model(params, start_price, size):
+    return (make_profit(*params),
+            profit_coefficients(*params),
+            PriceGrid(start_price, params[3], size))
+
+def float_model(params, start_price, size):
+    params = [float(x) for x in params]
+    return (make_profit(*params),
+            profit_coefficients(*params),
+            PriceGrid(float(start_price), params[3], size))
+
+def to_cents(value):
+    cents = Decimal(value) * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f'{value} is not a whole number of cents')
+    return int(cents)
+
+def cents_model(params, start_price, size):
+    '''
+    Integer version of the model.  Prices and costs are in cents and profit
+    is scaled by the price step (also in cents) so that attendance never
+    needs a division.  Scaling by a positive constant doesn't move the
+    optimum.  Attendance figures must be whole numbers.
+    '''
+    (base_price, base_attendance, attendace_change, price_change,
+     fixed_cost, variable_cost_per_attendee) = params
+    if base_attendance % 1 or attendace_change % 1:
+        raise ValueError('cents arithmetic needs whole-number attendance figures')
+    base_price, price_change, fixed_cost, variable_cost_per_attendee = map(
+        to_cents, (base_price, price_change, fixed_cost, variable_cost_per_attendee))
+    base_attendance, attendace_change = int(base_attendance), int(attendace_change)
+
+    def profit(price):
+        scaled_attendees = base_attendance * price_change + (base_price - price) * attendace_change
+        return (price - variable_cost_per_attendee) * scaled_attendees - fixed_cost * price_change
+
+    # scaled_attendees = alpha - beta * price
+    alpha = base_attendance * price_change + base_price * attendace_change
+    beta = attendace_change
+    coefficients = (-beta,
+                    alpha + beta * variable_cost_per_attendee,
+                    -alpha * variable_cost_per_attendee - fixed_cost * price_change)
+    return profit, coefficients, PriceGrid(to_cents(start_price), price_change, size)
+
+# Numeric backends for best_price().  Each one turns the (Decimal) model
+# parameters into a profit function, its quadratic coefficients and a price grid.
+ARITHMETIC = {
+    'decimal': decimal_model,
+    'float': float_model,
+    'cents': cents_model,
+}
+
+def best_price(base_price=Decimal('5.0'),
+               base_attendance=Decimal('120'),
+               attendace_change=Decimal('15'),
+               price_change=Decimal('0.1'),
+               fixed_cost=Decimal('180'),
+               variable_cost_per_attendee=Decimal('0.04'),
+               start_price=Decimal('0.10'),
+               end_price=Decimal('10.00'),
+               method='scan',
+               arithmetic='decimal'):
+    '''
+    Find the ticket price (on the price_change grid) that maximizes profit.
+
+    method is one of:
+        'scan'      - try every price on the grid (the original approach)
+        'ternary'   - ternary search on the grid, O(log n) profit evaluations
+        'quadratic' - solve the quadratic profit curve directly, O(1)
+    All three return the same price.
+
+    arithmetic selects the numbers used for the profit calculation:
+    'decimal' (exact), 'float' (fast) or 'cents' (exact integers, needs
+    whole-cent prices and costs).  The result is always a Decimal price.
+    '''
+    params = [Decimal(x) for x in (base_price, base_attendance, attendace_change,
+                                   price_change, fixed_cost, variable_cost_per_attendee)]
+    start_price, end_price = Decimal(start_price), Decimal(end_price)
+    price_change = params[3]
+    size = grid_size(start_price, end_price, price_change)
+    if arithmetic not in ARITHMETIC:
+        raise ValueError(f'Unknown arithmetic {arithmetic!r}')
+    profit, coefficients, prices = ARITHMETIC[arithmetic](params, start_price, size)
+
+    if method == 'scan':
+        k = scan_index(profit, prices)
+    elif method == 'ternary':
+        k = ternary_index(profit, prices)
+    elif method == 'quadratic':
+        k = quadratic_index(*coefficients, prices)
+    else:
+        raise ValueError(f'Unknown method {method!r}')
+    return start_price + k * price_change
+
+def audit_best_price(*args, **kwargs):
+    '''
+    Run best_price() with every arithmetic backend and make sure they all
+    pick the same price.  Backends that can't represent the parameters
+    (e.g. cents with fractional-cent costs) are skipped.
+    '''
+    results = { }
+    for arithmetic in ARITHMETIC:
+        try:
+            results[arithmetic] = best_price(*args, arithmetic=arithmetic, **kwargs)
+        except ValueError:
+            if arithmetic == 'decimal':
+                raise
+    if len(set(results.values())) != 1:
+        raise ArithmeticError(f'Backends disagree on the best price: {results}')
+    return results['decimal']
+
+class PricingModel:
+    '''
+    A pricing model that keeps its profit curve around between questions.
+
+    Revenue and attendance at every grid price don't depend on the costs,
+    so they are computed once.  Changing fixed_cost shifts the whole curve
+    and leaves the best price alone.  Changing variable_cost_per_attendee
+    only moves the vertex of the quadratic, so the new optimum is found
+    in O(1).  Any other change rebuilds the curve.
+
+        >>> model = PricingModel()
+        >>> model.best_price
+        Decimal('2.90')
+        >>> model.update(variable_cost_per_attendee='0.75')
+        >>> model.best_price
+        Decimal('3.30')
+    '''
+    parameters = ('base_price', 'base_attendance', 'attendace_change', 'price_change',
+                  'fixed_cost', 'variable_cost_per_attendee', 'start_price', 'end_price')
+    cost_parameters = ('fixed_cost', 'variable_cost_per_attendee')
+
+    def __init__(self, base_price=Decimal('5.0'),
+                 base_attendance=Decimal('120'),
+                 attendace_change=Decimal('15'),
+                 price_change=Decimal('0.1'),
+                 fixed_cost=Decimal('180'),
+                 variable_cost_per_attendee=Decimal('0.04'),
+                 start_price=Decimal('0.10'),
+                 end_price=Decimal('10.00')):
+        self._params = { }
+        self.update(base_price=base_price, base_attendance=base_attendance,
+                    attendace_change=attendace_change, price_change=price_change,
+                    fixed_cost=fixed_cost, variable_cost_per_attendee=variable_cost_per_attendee,
+                    start_price=start_price, end_price=end_price)
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['_params'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        args = ', '.join(f'{name}={value!r}' for name, value in self._params.items())
+        return f'PricingModel({args})'
+
+    def update(self, **changes):
+        '''
+        Change one or more model parameters and re-optimize.
+        '''
+        for name in changes:
+            if name not in self.parameters:
+                raise TypeError(f'Unknown parameter {name!r}')
+        changes = { name: Decimal(value) for name, value in changes.items()
+                    if self._params.get(name) != Decimal(value) }
+        self._params.update(changes)
+        if not set(changes) <= set(self.cost_parameters):
+            self._rebuild()
+        elif 'variable_cost_per_attendee' in changes:
+            self._reoptimize()
+
+    def _rebuild(self):
+        p = self._params
+        self.prices = PriceGrid(p['start_price'], p['price_change'],
+                                grid_size(p['start_price'], p['end_price'], p['price_change']))
+        self._attendees = [p['base_attendance'] + (p['base_price'] - price) / p['price_change'] * p['attendace_change']
+                           for price in self.prices]
+        self._revenue = [price * attendees for price, attendees in zip(self.prices, self._attendees)]
+        self._reoptimize()
+
+    def _reoptimize(self):
+        p = self._params
+        coefficients = profit_coefficients(p['base_price'], p['base_attendance'], p['attendace_change'],
+                                           p['price_change'], p['fixed_cost'], p['variable_cost_per_attendee'])
+        self._best = quadratic_index(*coefficients, self.prices)
+
+    def profit_at(self, index):
+        '''
+        Profit at the given grid index using the cached curve.
+        '''
+        attendees = self._attendees[index]
+        return self._revenue[index] - (self.fixed_cost + self.variable_cost_per_attendee * attendees)
+
+    def curve(self):
+        '''
+        List of (price, profit) pairs for the whole grid.
+        '''
+        return [(price, self.profit_at(k)) for k, price in enumerate(self.prices)]
+
+    @property
+    def best_price(self):
+        return self.prices[self._best]
+
+    @property
+    def best_profit(self):
+        return self.profit_at(self._best)
+
+def test_best_price():
+    for method in ['scan', 'ternary', 'quadratic']:
+        assert best_price(method=method) == Decimal('2.90')
+
+    # A few other scenarios, including optima at the ends of the grid
+    for fixed_cost, variable_cost in [('0', '0'), ('500', '0.75'), ('180', '9.50'), ('180', '-20')]:
+        expected = best_price(fixed_cost=fixed_cost, variable_cost_per_attendee=variable_cost)
+        for method in ['ternary', 'quadratic']:
+            assert best_price(fixed_cost=fixed_cost, variable_cost_per_attendee=variable_cost,
+                              method=method) == expected
+
+    # Vertex exactly halfway between $2.90 and $3.00. Ties go to the lower price.
+    for method in ['scan', 'ternary', 'quadratic']:
+        assert best_price(base_attendance='129', method=method) == Decimal('2.90')
+
+def test_arithmetic():
+    for arithmetic in ['decimal', 'float', 'cents']:
+        for method in ['scan', 'ternary', 'quadratic']:
+            assert best_price(method=method, arithmetic=arithmetic) == Decimal('2.90')
+
+    # Exact backends agree on the tie, float might not
+    assert best_price(base_attendance='129', arithmetic='cents') == Decimal('2.90')
+    assert audit_best_price(fixed_cost='500', variable_cost_per_attendee='0.75') == \
+           best_price(fixed_cost='500', variable_cost_per_attendee='0.75')
+
+    # Fractional cents can't use the integer backend
+    try:
+        best_price(variable_cost_per_attendee='0.045', arithmetic='cents')
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+    assert audit_best_price(variable_cost_per_attendee='0.045') == Decimal('2.90')
+
+def test_pricing_model():
+    model = PricingModel()
+    assert model.best_price == best_price()
+    assert model.best_profit == max(profit for _, profit in model.curve())
+
+    # Change costs one at a time and compare against a full re-run
+    params = { }
+    for name, value in [('fixed_cost', '500'), ('variable_cost_per_attendee', '0.75'),
+                        ('variable_cost_per_attendee', '9.50'), ('fixed_cost', '0'),
+                        ('base_attendance', '129'), ('variable_cost_per_attendee', '0.04'),
+                        ('price_change', '0.05')]:
+        params[name] = value
+        model.update(**{ name: value })
+        assert model.best_price == best_price(**params), (params, model.best_price)
+        assert model.best_profit == max(profit for _, profit in model.curve())
+    assert model.fixed_cost == Decimal('0')
+
+    try:
+        model.update(ticket_price='3')
+        assert False, 'expected TypeError'
+    except TypeError:
+        pass
 
-        
\ No newline at end of file
+if __name__ == '__main__':
+    test_best_price()
+    test_arithmetic()
+    test_pricing_model()
+    print(f"Best price is ${best_price()}")
@@ -0,0 +1,64 @@
+# backends.py
+#
+# ex1.py - ex6.py (and slotted.py) all implement the same "legacy"
+# fraction interface--make_frac(), numerator(), denominator(),
+# add_frac(), sub_frac(), mul_frac() and div_frac()--on top of a
+# different representation.  This module picks one of them when it is
+# first imported and re-exports its functions, so code written against
+# the legacy interface can switch representations without changing.
+#
+#     from backends import make_frac, add_frac
+#
+# The backend is chosen by the FRAC_BACKEND environment variable:
+#
+#     bash $ FRAC_BACKEND=slotted python myprogram.py
+#
+# See bench.py for a comparison of the backends.
+
+import importlib
+import os
+
+# Backend name -> module.  ex5.py isn't listed since its tests fail on purpose.
+BACKENDS = {
+    'tuple': 'ex1',
+    'dict': 'ex2',
+    'closure': 'ex3',
+    'namedtuple': 'ex4',
+    'class': 'ex6',
+    'slotted': 'slotted',
+}
+
+DEFAULT_BACKEND = 'class'
+
+API = ('make_frac', 'numerator', 'denominator', 'add_frac', 'sub_frac', 'mul_frac', 'div_frac')
+
+def register(name, modname):
+    '''
+    Add a backend.  The module must define all of the functions in API.
+    '''
+    BACKENDS[name] = modname
+
+def load(name):
+    '''
+    Import and return the module implementing the named backend.
+    '''
+    try:
+        modname = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f'Unknown fraction backend {name!r}. Choose from: {", ".join(BACKENDS)}') from None
+    module = importlib.import_module(modname)
+    missing = [func for func in API if not hasattr(module, func)]
+    if missing:
+        raise TypeError(f'Backend {name!r} ({modname}) is missing {", ".join(missing)}')
+    return module
+
+backend = os.environ.get('FRAC_BACKEND', DEFAULT_BACKEND)
+module = load(backend)
+
+make_frac = module.make_frac
+numerator = module.numerator
+denominator = module.denominator
+add_frac = module.add_frac
+sub_frac = module.sub_frac
+mul_frac = module.mul_frac
+div_frac = module.div_frac
@@ -0,0 +1,183 @@
+# bench.py
+#
+# Timing comparisons for the Fraction implementations in this project.
+# Run it directly:
+#
+#     bash $ python bench.py
+#
+# Each benchmark reports the time per operation for ex6.Fraction next
+# to the standard library's fractions.Fraction.
+
+import fractions
+import random
+import sys
+import timeit
+import tracemalloc
+
+import ex6
+
+def timed(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+def report(title, results):
+    print(title)
+    for name, ns in results.items():
+        print(f'    {name:>20s} {ns:10.1f} ns/op')
+
+def bench_construction(number=100_000):
+    random.seed(0)
+    pairs = [(random.randint(-1000, 1000), random.randint(1, 1000)) for _ in range(1000)]
+    for title, args in [('construct n/1', (7, 1)),
+                        ('construct reduced', (355, 113)),
+                        ('construct unreduced', (710, 226)),
+                        ('construct random', None)]:
+        results = { }
+        for name, cls in [('ex6.Fraction', ex6.Fraction), ('fractions.Fraction', fractions.Fraction)]:
+            if args:
+                results[name] = timed(lambda: cls(*args), number)
+            else:
+                results[name] = timed(lambda: [cls(n, d) for n, d in pairs], number // 1000) / len(pairs)
+        report(title, results)
+
+def bench_arithmetic(number=100_000):
+    for title, op in [('add', lambda a, b: a + b),
+                      ('mul', lambda a, b: a * b),
+                      ('int + frac', lambda a, b: 1 + a)]:
+        results = { }
+        for name, cls in [('ex6.Fraction', ex6.Fraction), ('fractions.Fraction', fractions.Fraction)]:
+            a, b = cls(2, 3), cls(3, 4)
+            results[name] = timed(lambda: op(a, b), number)
+        report(title, results)
+
+    # Large operands with lots of common factors
+    for title, op in [('big add', lambda a, b: a + b),
+                      ('big mul', lambda a, b: a * b),
+                      ('big div', lambda a, b: a / b)]:
+        results = { }
+        for name, cls in [('ex6.Fraction', ex6.Fraction), ('fractions.Fraction', fractions.Fraction)]:
+            a, b = cls(3**400 * 7, 2**600 * 5), cls(2**580 * 11, 3**390 * 5**3)
+            results[name] = timed(lambda: op(a, b), number // 10)
+        report(title, results)
+
+def bench_mixed(number=100_000):
+    # Fraction (op) other for each kind of other operand.  Note that
+    # fractions.Fraction gives a float result for float operands while
+    # ex6.Fraction converts the float exactly.
+    import operator
+    ops = [('+', operator.add), ('-', operator.sub), ('*', operator.mul), ('/', operator.truediv)]
+    for name, cls in [('ex6.Fraction', ex6.Fraction), ('fractions.Fraction', fractions.Fraction)]:
+        a = cls(2, 3)
+        operands = [('int', 7), ('float', 0.375), ('Fraction', cls(3, 4))]
+        print(f'{name} (ns/op)')
+        print(f'{"":>14s}' + ''.join(f'{kind:>10s}' for kind, _ in operands))
+        for symbol, op in ops:
+            row = [timed(lambda: op(a, b), number) for _, b in operands]
+            print(f'{"a " + symbol + " x":>14s}' + ''.join(f'{ns:10.1f}' for ns in row))
+            row = [timed(lambda: op(b, a), number) for _, b in operands]
+            print(f'{"x " + symbol + " a":>14s}' + ''.join(f'{ns:10.1f}' for ns in row))
+
+def bench_conversion(count=100_000):
+    random.seed(0)
+    prices = [round(random.uniform(1, 1000), 2) for _ in range(count)]
+    texts = [f'{p:.2f}' for p in prices]
+    report(f'convert {count} floats', {
+        'Fraction.from_floats': timed(lambda: ex6.Fraction.from_floats(prices), 3) / count,
+        'fractions.Fraction': timed(lambda: [fractions.Fraction(p) for p in prices], 3) / count,
+    })
+    report(f'convert {count} floats, max denominator 100', {
+        'Fraction.from_floats': timed(lambda: ex6.Fraction.from_floats(prices, 100), 3) / count,
+        'fractions.Fraction': timed(lambda: [fractions.Fraction(p).limit_denominator(100) for p in prices], 3) / count,
+    })
+    report(f'convert {count} strings', {
+        'Fraction.from_strings': timed(lambda: ex6.Fraction.from_strings(texts), 3) / count,
+        'fractions.Fraction': timed(lambda: [fractions.Fraction(t) for t in texts], 3) / count,
+    })
+
+def bench_lazy(count=1000):
+    # Fixed-point amounts with 18 decimal places.  Eager reduction gives
+    # every value its own denominator, lazy reduction keeps them shared.
+    random.seed(0)
+    amounts = [random.randint(1, 10**24) for _ in range(count)]
+    results = { }
+    for name, cls in [('ex6.Fraction', ex6.Fraction), ('ex6.LazyFraction', ex6.LazyFraction),
+                      ('fractions.Fraction', fractions.Fraction)]:
+        values = [cls(a, 10**18) for a in amounts]
+        def total():
+            t = cls(0)
+            for v in values:
+                t = t + v
+            return t.numerator
+        results[name] = timed(total, 20) / count
+    report(f'sum of {count} fixed-point amounts', results)
+
+def bench_array(count=10_000):
+    from fracarray import FractionArray
+    random.seed(0)
+    values = [ex6.Fraction(random.randint(1, 10**6), random.randint(1, 10**6)) for _ in range(count)]
+    array = FractionArray.from_fractions(values)
+    ratio = ex6.Fraction(3, 7)
+    report(f'scale {count} values', {
+        'list of Fraction': timed(lambda: [v * ratio for v in values], 20) / count,
+        'FractionArray': timed(lambda: array * ratio, 20) / count,
+    })
+    report(f'sum {count} values', {
+        'list of Fraction': timed(lambda: sum(values, ex6.Fraction(0)), 5) / count,
+        'FractionArray': timed(lambda: array.sum(), 5) / count,
+    })
+
+def bench_backends(count=100_000, batch=10_000):
+    '''
+    Compare every backend in backends.BACKENDS on:
+
+        - bytes per value holding count fractions
+        - runs of the backend's own test_frac() per second
+        - legacy-interface operations per second on a batch of random
+          fractions (make_frac, then add/sub/mul/div of neighbors)
+
+    The batch results are checked against fractions.Fraction.
+    '''
+    import contextlib
+    import io
+    import backends
+
+    random.seed(0)
+    # Nonzero numerators so that every value can be a divisor
+    pairs = [(random.choice([-1, 1]) * random.randint(1, 1000), random.randint(1, 1000)) for _ in range(count)]
+    expected = [fractions.Fraction(n, d) for n, d in pairs[:batch + 1]]
+
+    print(f'{"backend":>12s} {"bytes/value":>12s} {"test_frac/s":>12s} '
+          f'{"make/s":>12s} {"add/s":>12s} {"sub/s":>12s} {"mul/s":>12s} {"div/s":>12s}')
+    for name in backends.BACKENDS:
+        mod = backends.load(name)
+        make_frac = mod.make_frac
+        num, den = mod.numerator, mod.denominator
+
+        tracemalloc.start()
+        values = [make_frac(n, d) for n, d in pairs]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # Subtract the list holding the values
+        size -= sys.getsizeof(values)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            tests = 1e9 / timed(mod.test_frac, 100)
+
+        rates = [1e9 * batch / timed(lambda: [make_frac(n, d) for n, d in pairs[:batch]], 5)]
+        left, right = values[:batch], values[1:batch + 1]
+        for func, op in [(mod.add_frac, lambda a, b: a + b), (mod.sub_frac, lambda a, b: a - b),
+                         (mod.mul_frac, lambda a, b: a * b), (mod.div_frac, lambda a, b: a / b)]:
+            results = [func(a, b) for a, b in zip(left, right)]
+            for r, a, b in zip(results, expected, expected[1:]):
+                assert fractions.Fraction(num(r), den(r)) == op(a, b), (name, r)
+            rates.append(1e9 * batch / timed(lambda: [func(a, b) for a, b in zip(left, right)], 5))
+
+        print(f'{name:>12s} {size / count:12.1f} {tests:12.0f} ' + ' '.join(f'{rate:12.0f}' for rate in rates))
+
+if __name__ == '__main__':
+    bench_construction()
+    bench_arithmetic()
+    bench_mixed()
+    bench_conversion()
+    bench_lazy()
+    bench_array()
+    bench_backends()
@@ -24,57 +24,242 @@
 # Python magic methods.
 # -----------------------------------------------------------------------------
 
+import decimal
+import math
+import operator
+import sys
+from collections import OrderedDict
+
 def gcd(a, b):
     # Greatest common divisor
     while b:
         a, b = b, a % b
     return a
 
+def hash_fraction(numerator, denominator):
+    # Same algorithm as fractions.Fraction so that equal ints, floats and
+    # fractions all hash the same (see "Hashing of numeric types" in the
+    # Python docs).  The fraction must be in lowest terms.
+    try:
+        dinv = pow(denominator, -1, sys.hash_info.modulus)
+    except ValueError:
+        hash_ = sys.hash_info.inf
+    else:
+        hash_ = hash(hash(abs(numerator)) * dinv)
+    result = hash_ if numerator >= 0 else -hash_
+    return -2 if result == -1 else result
+
+def _parts(x):
+    # Numerator and denominator of an operand (Fraction, int, float, ...)
+    if type(x) is float:
+        return x.as_integer_ratio()
+    return x.numerator, x.denominator
+
+# Arithmetic on (numerator, denominator) pairs.  Common factors are
+# cancelled *before* multiplying (Knuth, TAOCP Vol 2, 4.5.1) so the
+# intermediate products stay small and the results come out already in
+# lowest terms.  This relies on both operands being reduced, which is
+# always true for Fraction, int and float.
+def _add(n1, d1, n2, d2):
+    g = math.gcd(d1, d2)
+    if g == 1:
+        return Fraction._from_reduced(n1 * d2 + d1 * n2, d1 * d2)
+    s = d1 // g
+    t = n1 * (d2 // g) + n2 * s
+    g2 = math.gcd(t, g)
+    return Fraction._from_reduced(t // g2, s * (d2 // g2))
+
+def _mul(n1, d1, n2, d2):
+    g1 = math.gcd(n1, d2)
+    g2 = math.gcd(n2, d1)
+    return Fraction._from_reduced((n1 // g1) * (n2 // g2), (d1 // g2) * (d2 // g1))
+
+def _div(n1, d1, n2, d2):
+    if n2 == 0:
+        raise ZeroDivisionError(f'Fraction({n1}, 0)')
+    g1 = math.gcd(n1, n2)
+    g2 = math.gcd(d2, d1)
+    n, d = (n1 // g1) * (d2 // g2), (d1 // g2) * (n2 // g1)
+    if d < 0:
+        n, d = -n, -d
+    return Fraction._from_reduced(n, d)
+
 # We will define a proper class
 class Fraction:
-    def __init__(self, numerator, denominator):
-        d = gcd(numerator, denominator)
-        self.numerator = numerator // d
-        self.denominator = denominator // d
+    def __init__(self, numerator, denominator=1):
+        # Fast paths.  Whole numbers are already in lowest terms and the
+        # C-level math.gcd() is much faster than the gcd() loop above.
+        # Note: math.gcd() is always positive so the sign is fixed up here.
+        if denominator != 1:
+            if denominator < 0:
+                numerator, denominator = -numerator, -denominator
+            elif denominator == 0:
+                raise ZeroDivisionError(f'Fraction({numerator}, 0)')
+            d = math.gcd(numerator, denominator)
+            if d != 1:
+                numerator //= d
+                denominator //= d
+        self.numerator = numerator
+        self.denominator = denominator
+
+    @classmethod
+    def _from_reduced(cls, numerator, denominator):
+        # Internal constructor for results already known to be in lowest
+        # terms with a positive denominator.  No checking is performed.
+        self = object.__new__(cls)
+        self.numerator = numerator
+        self.denominator = denominator
+        return self
+
+    # Alternate constructors.  Floats, Decimals and ints all know how to
+    # turn themselves into an exact (numerator, denominator) pair in
+    # lowest terms with as_integer_ratio().
+    @classmethod
+    def from_float(cls, value):
+        return cls._from_reduced(*value.as_integer_ratio())
+
+    @classmethod
+    def from_decimal(cls, value):
+        return cls._from_reduced(*value.as_integer_ratio())
+
+    @classmethod
+    def from_string(cls, text):
+        '''
+        Parse '3/4', '-2', '1.25' or '1e-3'.
+        '''
+        if '/' in text:
+            numerator, denominator = text.split('/')
+            return cls(int(numerator), int(denominator))
+        try:
+            value = decimal.Decimal(text)
+        except decimal.InvalidOperation:
+            raise ValueError(f'Invalid fraction: {text!r}') from None
+        return cls.from_decimal(value)
+
+    # Batch versions.  Each converts a whole sequence in one pass and
+    # optionally limits the denominators (see limit_denominator()).
+    @classmethod
+    def from_floats(cls, values, max_denominator=None):
+        make = cls._from_reduced
+        result = [make(*value.as_integer_ratio()) for value in values]
+        if max_denominator is not None:
+            result = [f.limit_denominator(max_denominator) for f in result]
+        return result
+
+    @classmethod
+    def from_decimals(cls, values, max_denominator=None):
+        # Decimals have as_integer_ratio() too
+        return cls.from_floats(values, max_denominator)
+
+    @classmethod
+    def from_strings(cls, texts, max_denominator=None):
+        result = [cls.from_string(text) for text in texts]
+        if max_denominator is not None:
+            result = [f.limit_denominator(max_denominator) for f in result]
+        return result
+
+    def limit_denominator(self, max_denominator=1000000):
+        '''
+        The closest fraction to self with a denominator no bigger than
+        max_denominator.  Found by walking the continued fraction
+        expansion of self: the answer is either the last convergent
+        within the limit or a semiconvergent just beyond it.
+        '''
+        if max_denominator < 1:
+            raise ValueError('max_denominator should be at least 1')
+        n, d = self.numerator, self.denominator
+        if d <= max_denominator:
+            return self
+        p0, q0, p1, q1 = 0, 1, 1, 0
+        a, b = n, d
+        while True:
+            k = a // b
+            q2 = q0 + k * q1
+            if q2 > max_denominator:
+                break
+            p0, q0, p1, q1 = p1, q1, p0 + k * p1, q2
+            a, b = b, a - k * b
+        k = (max_denominator - q0) // q1
+        p2, q2 = p0 + k * p1, q0 + k * q1
+        # Pick whichever of p1/q1 and p2/q2 is closer to n/d (p1/q1 on a tie)
+        if abs(p1 * d - q1 * n) * q2 <= abs(p2 * d - q2 * n) * q1:
+            return type(self)._from_reduced(p1, q1)
+        return type(self)._from_reduced(p2, q2)
 
     # Define various magic methods for Python operators
+    #
+    # Integers get their own fast paths: adding or subtracting one never
+    # needs a gcd, and multiplying or dividing needs just one.  Floats
+    # are converted exactly (float.as_integer_ratio()), so the result of
+    # mixing a Fraction and a float is an exact Fraction.
     def __add__(self, other):
-        return Fraction(self.numerator * other.denominator + self.denominator * other.numerator, self.denominator * other.denominator)  
+        if type(other) is int:
+            return Fraction._from_reduced(self.numerator + other * self.denominator, self.denominator)
+        return _add(self.numerator, self.denominator, *_parts(other))
     
     def __sub__(self, other):
-        return Fraction(self.numerator * other.denominator - self.denominator * other.numerator, self.denominator * other.denominator)      
+        if type(other) is int:
+            return Fraction._from_reduced(self.numerator - other * self.denominator, self.denominator)
+        n2, d2 = _parts(other)
+        return _add(self.numerator, self.denominator, -n2, d2)
   
     def __mul__(self, other):
-        return Fraction(self.numerator * other.numerator, self.denominator * other.denominator)
+        if type(other) is int:
+            g = math.gcd(other, self.denominator)
+            return Fraction._from_reduced(self.numerator * (other // g), self.denominator // g)
+        return _mul(self.numerator, self.denominator, *_parts(other))
     
     def __truediv__(self, other):
-        return Fraction(self.numerator * other.denominator, self.denominator * other.numerator) 
+        if type(other) is int:
+            return _div(self.numerator, self.denominator, other, 1)
+        return _div(self.numerator, self.denominator, *_parts(other))
     
+    # Reflected operations (int + Fraction, float * Fraction, ...) compute
+    # the result directly rather than converting other to a Fraction first.
     def __radd__(self, other):
-        return Fraction(self.numerator + other * self.denominator, self.denominator)
+        if type(other) is int:
+            return Fraction._from_reduced(self.numerator + other * self.denominator, self.denominator)
+        return _add(*_parts(other), self.numerator, self.denominator)
     
     def __rsub__(self, other):
-        return Fraction(other * self.denominator - self.numerator, self.denominator)
+        if type(other) is int:
+            return Fraction._from_reduced(other * self.denominator - self.numerator, self.denominator)
+        return _add(*_parts(other), -self.numerator, self.denominator)
     
-    def __rmul__(self, other):
-        return Fraction(self.numerator * other, self.denominator)
+    __rmul__ = __mul__
     
     def __rtruediv__(self, other):
-        return Fraction(other * self.denominator, self.numerator)
+        return _div(*_parts(other), self.numerator, self.denominator)
     
-    # Comparison operators
+    # Comparison operators.  Comparing with something that isn't a number
+    # returns NotImplemented, so equality is just False and fractions can
+    # be mixed with other dict keys.  Every finite float is compared
+    # exactly.  A fraction is finite, so against inf or nan it behaves
+    # like any other finite float (0.0 will do, and can't overflow).
+    def _compare(self, other, op):
+        if type(other) is float and not math.isfinite(other):
+            return op(0.0, other)
+        try:
+            n2, d2 = _parts(other)
+        except AttributeError:
+            return NotImplemented
+        return op(self.numerator * d2, self.denominator * n2)
+
     def __eq__(self, other):
-        return self.numerator * other.denominator == self.denominator * other.numerator
+        return self._compare(other, operator.eq)
     def __ne__(self, other):
-        return self.numerator * other.denominator != self.denominator * other.numerator
+        return self._compare(other, operator.ne)
     def __lt__(self, other):
-        return self.numerator * other.denominator < self.denominator * other.numerator
+        return self._compare(other, operator.lt)
     def __le__(self, other):
-        return self.numerator * other.denominator <= self.denominator * other.numerator
+        return self._compare(other, operator.le)
     def __gt__(self, other):
-        return self.numerator * other.denominator > self.denominator * other.numerator
+        return self._compare(other, operator.gt)
     def __ge__(self, other):
-        return self.numerator * other.denominator >= self.denominator * other.numerator
+        return self._compare(other, operator.ge)
+    def __hash__(self):
+        return hash_fraction(self.numerator, self.denominator)
+
     # Niceties
     def __str__(self):
         if self.denominator == 1:
@@ -93,6 +278,157 @@ class Fraction:
     def __int__(self):
         return self.numerator // self.denominator    
         
+# Lazy reduction.  In a long chain of arithmetic such as a big sum,
+# reducing every intermediate result costs a gcd per step even though
+# only the final answer is ever looked at.  A LazyFraction keeps its
+# numerator/denominator unreduced and only reduces when they're
+# actually read (comparisons, printing, conversions) or when
+# normalize() is called.  If the intermediate values grow beyond
+# max_bits, they're reduced right away to keep them from blowing up.
+class LazyFraction(Fraction):
+    max_bits = 256
+
+    def __init__(self, numerator, denominator=1):
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        elif denominator == 0:
+            raise ZeroDivisionError(f'LazyFraction({numerator}, 0)')
+        self._numerator = numerator
+        self._denominator = denominator
+        self._reduced = denominator == 1
+
+    @classmethod
+    def _from_reduced(cls, numerator, denominator):
+        self = object.__new__(cls)
+        self._numerator = numerator
+        self._denominator = denominator
+        self._reduced = True
+        return self
+
+    @classmethod
+    def _make(cls, numerator, denominator):
+        # Internal constructor. The denominator must already be positive.
+        self = object.__new__(cls)
+        self._numerator = numerator
+        self._denominator = denominator
+        self._reduced = denominator == 1
+        if numerator.bit_length() > cls.max_bits or denominator.bit_length() > cls.max_bits:
+            self.normalize()
+        return self
+
+    def normalize(self):
+        if not self._reduced:
+            d = math.gcd(self._numerator, self._denominator)
+            if d != 1:
+                self._numerator //= d
+                self._denominator //= d
+            self._reduced = True
+        return self
+
+    # Reading either part puts the fraction into lowest terms
+    @property
+    def numerator(self):
+        return self.normalize()._numerator
+
+    @property
+    def denominator(self):
+        return self.normalize()._denominator
+
+    @staticmethod
+    def _parts(other):
+        if isinstance(other, LazyFraction):
+            return other._numerator, other._denominator
+        return _parts(other)
+
+    def __add__(self, other):
+        if type(other) is LazyFraction:
+            n, d = other._numerator, other._denominator
+        else:
+            n, d = _parts(other)
+        if d == self._denominator:
+            return LazyFraction._make(self._numerator + n, d)
+        return LazyFraction._make(self._numerator * d + self._denominator * n, self._denominator * d)
+
+    def __sub__(self, other):
+        n, d = LazyFraction._parts(other)
+        if d == self._denominator:
+            return LazyFraction._make(self._numerator - n, d)
+        return LazyFraction._make(self._numerator * d - self._denominator * n, self._denominator * d)
+
+    def __mul__(self, other):
+        n, d = LazyFraction._parts(other)
+        return LazyFraction._make(self._numerator * n, self._denominator * d)
+
+    def __truediv__(self, other):
+        n, d = LazyFraction._parts(other)
+        if n < 0:
+            n, d = -n, -d
+        elif n == 0:
+            raise ZeroDivisionError('division by zero')
+        return LazyFraction._make(self._numerator * d, self._denominator * n)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __rsub__(self, other):
+        n, d = _parts(other)
+        return LazyFraction._make(n * self._denominator - self._numerator * d, d * self._denominator)
+
+    def __rtruediv__(self, other):
+        n, d = _parts(other)
+        numerator, denominator = self._denominator, self._numerator
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        elif denominator == 0:
+            raise ZeroDivisionError('division by zero')
+        return LazyFraction._make(n * numerator, d * denominator)
+
+    def __repr__(self):
+        return f"LazyFraction({self.numerator}, {self.denominator})"
+
+# Interning.  Code that aggregates lots of values tends to end up with
+# many separate but equal Fraction instances (1/2, 1/4, 3/4, ...).  An
+# InternTable hands back one shared instance for each small value, keeping
+# the most recently used maxsize of them.  Fractions with a numerator or
+# denominator of limit or more are returned unchanged.  Each type gets its
+# own entries, so a LazyFraction never comes back for a Fraction (or the
+# other way around).
+#
+# Note: The shared instances are handed to every caller.  Fraction
+# attributes can still be assigned, so interned fractions must be treated
+# as read-only.  Changing one changes it for everybody holding it.
+class InternTable:
+    def __init__(self, maxsize=1024, limit=2**16):
+        self.maxsize = maxsize
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        self._table = OrderedDict()
+
+    def __call__(self, f):
+        n, d = f.numerator, f.denominator
+        if not (-self.limit < n < self.limit and d < self.limit):
+            return f
+        key = (type(f), n, d)
+        shared = self._table.get(key)
+        if shared is not None:
+            self._table.move_to_end(key)
+            self.hits += 1
+            return shared
+        self.misses += 1
+        self._table[key] = f
+        if len(self._table) > self.maxsize:
+            self._table.popitem(last=False)
+        return f
+
+    def __len__(self):
+        return len(self._table)
+
+    def clear(self):
+        self._table.clear()
+
+intern = InternTable()
+
 # Legacy interface.   We'll continue to support it for backwards compatibility
 def make_frac(numerator, denominator):
     return Fraction(numerator, denominator)
@@ -253,3 +589,212 @@ def test_nice():
 # Uncomment when ready
 test_nice()
 
+# -----------------------------------------------------------------------------
+# Performance
+#
+# The constructor skips the gcd entirely for whole numbers and uses
+# math.gcd() otherwise.  Internal results that are known to be reduced
+# are built with Fraction._from_reduced().  See bench.py for timings
+# against the standard library fractions.Fraction.
+# -----------------------------------------------------------------------------
+
+def test_fast():
+    a = Fraction(5)
+    assert (a.numerator, a.denominator) == (5, 1)
+
+    b = Fraction(-6, -4)
+    assert (b.numerator, b.denominator) == (3, 2)
+
+    c = Fraction(0, -7)
+    assert (c.numerator, c.denominator) == (0, 1)
+
+    d = Fraction._from_reduced(2, 3)
+    assert isinstance(d, Fraction) and d == Fraction(2, 3)
+
+    try:
+        Fraction(1, 0)
+        assert False, 'expected ZeroDivisionError'
+    except ZeroDivisionError:
+        pass
+
+    print('Fast fractions')
+
+test_fast()
+
+def test_cross():
+    import fractions
+    import random
+    random.seed(0)
+    values = [Fraction(random.randint(-10**6, 10**6), random.randint(1, 10**6)) for _ in range(200)]
+    values += [Fraction(0), Fraction(1), Fraction(-3), Fraction(6, 4)]
+    for a, b in zip(values, values[1:] + values[:1]):
+        fa = fractions.Fraction(a.numerator, a.denominator)
+        fb = fractions.Fraction(b.numerator, b.denominator)
+        results = [(a + b, fa + fb), (a - b, fa - fb), (a * b, fa * fb), (3 * a, 3 * fa), (a * -4, fa * -4)]
+        if b.numerator:
+            results.append((a / b, fa / fb))
+        for c, fc in results:
+            # Results must already be in lowest terms with a positive denominator
+            assert (c.numerator, c.denominator) == (fc.numerator, fc.denominator), (a, b, c, fc)
+
+    try:
+        Fraction(1, 2) / Fraction(0)
+        assert False, 'expected ZeroDivisionError'
+    except ZeroDivisionError:
+        pass
+
+    print('Cross-cancelled fractions')
+
+test_cross()
+
+def test_lazy():
+    a = LazyFraction(4, 6)
+    assert a._numerator == 4                      # Not reduced yet...
+    assert (a.numerator, a.denominator) == (2, 3) # ...until it's looked at
+
+    # Chained sums stay unreduced and still give the right answer
+    total = LazyFraction(0)
+    for k in range(1, 8):
+        total = total + LazyFraction(k, 28)
+    assert total._denominator == 28 and total._numerator == 28
+    assert total == 1 and str(total) == '1'
+
+    # Mixing with Fraction and ints
+    b = LazyFraction(1, 2) + Fraction(1, 3) - 1
+    assert (b.numerator, b.denominator) == (-1, 6)
+    assert isinstance(b, LazyFraction) and isinstance(b, Fraction)
+    assert 1 / LazyFraction(-2, 4) == Fraction(-2)
+    assert repr(LazyFraction(2, 4) * 3) == 'LazyFraction(3, 2)'
+
+    # Intermediate values are kept below max_bits
+    total = LazyFraction(0)
+    for k in range(1, 200):
+        total = total + LazyFraction(1, k)
+        assert max(total._numerator.bit_length(), total._denominator.bit_length()) <= 2 * LazyFraction.max_bits
+    expected = Fraction(0)
+    for k in range(1, 200):
+        expected = expected + Fraction(1, k)
+    assert total == expected
+    big = LazyFraction(-3 * 2**300, 5 * 2**300)
+    assert (2 / big)._numerator == -10 and (2 / big)._denominator == 3
+    try:
+        1 / LazyFraction(0, 4)
+        assert False, 'expected ZeroDivisionError'
+    except ZeroDivisionError:
+        pass
+
+    print('Lazy fractions')
+
+test_lazy()
+
+def test_hash():
+    import fractions
+    assert hash(Fraction(4, 2)) == hash(2)
+    assert hash(Fraction(-1, 2)) == hash(fractions.Fraction(-1, 2)) == hash(-0.5)
+    assert hash(Fraction(1, 3)) == hash(fractions.Fraction(1, 3))
+    assert hash(LazyFraction(2, 6)) == hash(Fraction(1, 3))
+    assert len({ Fraction(1, 2), Fraction(2, 4), Fraction(3, 4), 1 - Fraction(1, 4) }) == 2
+    assert { Fraction(1, 2): 'half', 'x': 'y' }[Fraction(1, 2)] == 'half'
+    assert { 3: 'three' }[Fraction(6, 2)] == 'three'
+
+    table = InternTable(maxsize=2)
+    a = table(Fraction(1, 2))
+    assert table(Fraction(2, 4)) is a
+    b = table(Fraction(1, 3))
+    c = table(Fraction(1, 5))             # Evicts 1/2, the least recently used
+    assert len(table) == 2
+    assert table(Fraction(1, 3)) is b
+    assert table(Fraction(1, 2)) is not a
+    big = Fraction(1, 2**20)
+    assert table(big) is big and len(table) == 2
+    assert (table.hits, table.misses) == (2, 4)
+    lazy = table(LazyFraction(1, 3))
+    assert type(lazy) is LazyFraction and type(table(Fraction(1, 3))) is Fraction
+    assert table(LazyFraction(2, 6)) is lazy
+
+    print('Hashable fractions')
+
+test_hash()
+
+def test_mixed():
+    import fractions
+    a = Fraction(2, 3)
+
+    # Integers, both ways around
+    assert (a + 2, 2 + a, a - 2, 2 - a) == (Fraction(8, 3), Fraction(8, 3), Fraction(-4, 3), Fraction(4, 3))
+    assert (a * 6, 6 * a, a / 4, 4 / a) == (Fraction(4), Fraction(4), Fraction(1, 6), Fraction(6))
+    assert a / -2 == Fraction(-1, 3) and (a / -2).denominator == 3
+
+    # Floats are converted exactly
+    assert a + 0.5 == Fraction(7, 6) and 0.5 + a == Fraction(7, 6)
+    assert a - 0.25 == Fraction(5, 12) and 0.25 - a == Fraction(-5, 12)
+    assert a * 1.5 == 1 and 1.5 * a == 1 and a / 0.5 == Fraction(4, 3) and 0.5 / a == Fraction(3, 4)
+    assert Fraction(1, 10) + 0.1 == fractions.Fraction(1, 10) + fractions.Fraction(0.1)
+    assert Fraction(1, 2) == 0.5 and 0.5 == Fraction(1, 2) and Fraction(1, 3) != 1/3
+    assert Fraction(1, 3) < 0.34 and 0.25 < Fraction(1, 3)
+    assert { 0.5: 'half' }[Fraction(1, 2)] == 'half'
+
+    # Infinities and nan compare like floats.  Non-numbers can't be ordered.
+    nan, inf = float('nan'), float('inf')
+    assert not Fraction(1, 2) == nan and Fraction(1, 2) != nan and nan not in [Fraction(1, 2)]
+    assert not (Fraction(1, 2) < nan or Fraction(1, 2) >= nan)
+    assert Fraction(10**400) < inf and Fraction(-10**400) > -inf and -inf < LazyFraction(1, 2) < inf
+    try:
+        Fraction(1, 2) < 'a'
+        assert False, 'expected TypeError'
+    except TypeError:
+        pass
+
+    # Lazy fractions mix too
+    assert LazyFraction(1, 2) + 0.25 == Fraction(3, 4) and 1 - LazyFraction(1, 4) == 0.75
+    assert 0.5 / LazyFraction(1, 4) == 2
+
+    # Results are always reduced
+    for x in [a + 0.5, 0.5 * a, 3 - a, a / 3, 1.25 / a]:
+        f = fractions.Fraction(x.numerator, x.denominator)
+        assert (x.numerator, x.denominator) == (f.numerator, f.denominator)
+
+    print('Mixed fractions')
+
+test_mixed()
+
+def test_conversions():
+    import fractions
+    from decimal import Decimal
+
+    assert Fraction.from_float(0.375) == Fraction(3, 8)
+    assert Fraction.from_float(0.1) == fractions.Fraction(0.1)
+    assert Fraction.from_float(7) == 7
+    assert Fraction.from_decimal(Decimal('-1.25')) == Fraction(-5, 4)
+    assert Fraction.from_string('3/-4') == Fraction(-3, 4)
+    assert Fraction.from_string('32.20') == Fraction(161, 5)
+    assert Fraction.from_string(' 1e-3 ') == Fraction(1, 1000)
+    for bad in ['abc', '1/2/3', 'nan', 'inf']:
+        try:
+            Fraction.from_string(bad)
+            assert False, f'expected error for {bad!r}'
+        except (ValueError, OverflowError):
+            pass
+
+    # limit_denominator() agrees with the standard library
+    import math
+    import random
+    random.seed(0)
+    for x in [math.pi, math.e, -math.sqrt(2), 0.1, 1/3, 32.2] + [random.uniform(-100, 100) for _ in range(200)]:
+        for limit in [1, 7, 100, 1000, 10**6]:
+            got = Fraction.from_float(x).limit_denominator(limit)
+            expected = fractions.Fraction(x).limit_denominator(limit)
+            assert (got.numerator, got.denominator) == (expected.numerator, expected.denominator), (x, limit)
+    assert repr(Fraction.from_float(math.pi).limit_denominator(1000)) == 'Fraction(355, 113)'
+
+    # Batch versions
+    prices = [32.20, 91.10, 83.44, 51.23]
+    assert Fraction.from_floats(prices, 100) == [Fraction(161, 5), Fraction(911, 10), Fraction(2086, 25), Fraction(5123, 100)]
+    assert Fraction.from_decimals([Decimal('0.5'), Decimal(3)]) == [Fraction(1, 2), Fraction(3)]
+    assert Fraction.from_strings(['1/3', '0.25']) == [Fraction(1, 3), Fraction(1, 4)]
+    lazy = LazyFraction.from_floats([0.5, 0.25])
+    assert all(type(f) is LazyFraction for f in lazy) and lazy == [Fraction(1, 2), Fraction(1, 4)]
+
+    print('Converted fractions')
+
+test_conversions()
@@ -55,5 +55,6 @@ def fibonacci(n):
     return math.log2(int(result))
 
 # Try it out
-for n in range(1, 16):
-    print(fibonacci(n))
+if __name__ == '__main__':
+    for n in range(1, 16):
+        print(fibonacci(n))
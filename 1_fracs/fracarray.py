@@ -0,0 +1,234 @@
+# fracarray.py
+#
+# A container for applying the same operation to a lot of fractions.
+#
+# A list of Fraction instances means one object per value plus a method
+# call (and a new object) for every operation.  A FractionArray instead
+# keeps all of the numerators in one list and all of the denominators in
+# another.  Operations loop over the columns directly, and only build
+# Fraction instances when you ask for them.
+#
+# Note: The columns are ordinary Python lists of ints rather than
+# array('q') since the products of 64-bit numerators and denominators
+# quickly stop fitting in 64 bits.
+#
+#     >>> a = FractionArray.from_fractions([Fraction(1, 2), Fraction(2, 3)])
+#     >>> b = a * Fraction(3, 4)
+#     >>> b.to_fractions()
+#     [Fraction(3, 8), Fraction(1, 2)]
+#     >>> b.sum()
+#     Fraction(7, 8)
+
+import math
+from ex6 import Fraction
+
+class FractionArray:
+    # Both columns always hold fractions in lowest terms with a positive denominator
+    def __init__(self, numerators=(), denominators=None):
+        numerators = list(numerators)
+        if denominators is None:
+            denominators = [1] * len(numerators)
+        else:
+            denominators = list(denominators)
+            if len(numerators) != len(denominators):
+                raise ValueError('numerators and denominators must have the same length')
+            for i, (n, d) in enumerate(zip(numerators, denominators)):
+                if d != 1:
+                    f = Fraction(n, d)
+                    numerators[i], denominators[i] = f.numerator, f.denominator
+        self.numerators = numerators
+        self.denominators = denominators
+
+    @classmethod
+    def _from_reduced(cls, numerators, denominators):
+        self = object.__new__(cls)
+        self.numerators = numerators
+        self.denominators = denominators
+        return self
+
+    @classmethod
+    def from_fractions(cls, fractions):
+        '''
+        Build an array from anything with numerator/denominator attributes
+        (Fraction, fractions.Fraction, int).
+        '''
+        numerators = [ ]
+        denominators = [ ]
+        for f in fractions:
+            numerators.append(f.numerator)
+            denominators.append(f.denominator)
+        return cls._from_reduced(numerators, denominators)
+
+    def to_fractions(self):
+        make = Fraction._from_reduced
+        return [make(n, d) for n, d in zip(self.numerators, self.denominators)]
+
+    def __len__(self):
+        return len(self.numerators)
+
+    def __iter__(self):
+        return iter(self.to_fractions())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return FractionArray._from_reduced(self.numerators[index], self.denominators[index])
+        return Fraction._from_reduced(self.numerators[index], self.denominators[index])
+
+    def __repr__(self):
+        items = ', '.join(f'{n}/{d}' if d != 1 else f'{n}' for n, d in zip(self.numerators, self.denominators))
+        return f'FractionArray([{items}])'
+
+    def _columns(self, other):
+        # Columns for the other operand.  A single value is broadcast.
+        if isinstance(other, FractionArray):
+            if len(other) != len(self):
+                raise ValueError(f'length mismatch: {len(self)} != {len(other)}')
+            return other.numerators, other.denominators
+        n = len(self)
+        return [other.numerator] * n, [other.denominator] * n
+
+    # Elementwise arithmetic.  Same cross-cancelling algorithms as ex6.Fraction.
+    def __add__(self, other):
+        gcd = math.gcd
+        num, den = [ ], [ ]
+        for n1, d1, n2, d2 in zip(self.numerators, self.denominators, *self._columns(other)):
+            g = gcd(d1, d2)
+            if g == 1:
+                num.append(n1 * d2 + d1 * n2)
+                den.append(d1 * d2)
+            else:
+                s = d1 // g
+                t = n1 * (d2 // g) + n2 * s
+                g2 = gcd(t, g)
+                num.append(t // g2)
+                den.append(s * (d2 // g2))
+        return FractionArray._from_reduced(num, den)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return FractionArray._from_reduced([-n for n in self.numerators], list(self.denominators))
+
+    def __sub__(self, other):
+        return self + -FractionArray._from_reduced(*self._columns(other))
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        gcd = math.gcd
+        num, den = [ ], [ ]
+        for n1, d1, n2, d2 in zip(self.numerators, self.denominators, *self._columns(other)):
+            g1 = gcd(n1, d2)
+            g2 = gcd(n2, d1)
+            num.append((n1 // g1) * (n2 // g2))
+            den.append((d1 // g2) * (d2 // g1))
+        return FractionArray._from_reduced(num, den)
+
+    __rmul__ = __mul__
+
+    def reciprocal(self):
+        num, den = [ ], [ ]
+        for n, d in zip(self.numerators, self.denominators):
+            if n == 0:
+                raise ZeroDivisionError('division by zero')
+            if n < 0:
+                n, d = -n, -d
+            num.append(d)
+            den.append(n)
+        return FractionArray._from_reduced(num, den)
+
+    def __truediv__(self, other):
+        return self * FractionArray._from_reduced(*self._columns(other)).reciprocal()
+
+    def __rtruediv__(self, other):
+        return self.reciprocal() * other
+
+    # Elementwise comparisons.  Like NumPy, these return a list of bools.
+    def _compare(self, other, op):
+        return [op(n1 * d2, d1 * n2) for n1, d1, n2, d2 in
+                zip(self.numerators, self.denominators, *self._columns(other))]
+
+    def __eq__(self, other):
+        return self._compare(other, lambda x, y: x == y)
+
+    def __ne__(self, other):
+        return self._compare(other, lambda x, y: x != y)
+
+    def __lt__(self, other):
+        return self._compare(other, lambda x, y: x < y)
+
+    def __le__(self, other):
+        return self._compare(other, lambda x, y: x <= y)
+
+    def __gt__(self, other):
+        return self._compare(other, lambda x, y: x > y)
+
+    def __ge__(self, other):
+        return self._compare(other, lambda x, y: x >= y)
+
+    __hash__ = None
+
+    # Reductions
+    def sum(self):
+        # Accumulate over the least common multiple of the denominators
+        # and reduce once at the end.
+        gcd = math.gcd
+        total_n, total_d = 0, 1
+        for n, d in zip(self.numerators, self.denominators):
+            g = gcd(total_d, d)
+            total_n = total_n * (d // g) + n * (total_d // g)
+            total_d *= d // g
+        return Fraction(total_n, total_d)
+
+    def product(self):
+        return Fraction(math.prod(self.numerators), math.prod(self.denominators))
+
+    def _select(self, better):
+        if not self.numerators:
+            raise ValueError('empty FractionArray')
+        best_n, best_d = self.numerators[0], self.denominators[0]
+        for n, d in zip(self.numerators, self.denominators):
+            if better(n * best_d, best_n * d):
+                best_n, best_d = n, d
+        return Fraction._from_reduced(best_n, best_d)
+
+    def min(self):
+        return self._select(lambda x, y: x < y)
+
+    def max(self):
+        return self._select(lambda x, y: x > y)
+
+def test_fracarray():
+    import fractions
+    import random
+    random.seed(0)
+
+    a = [Fraction(random.randint(-1000, 1000), random.randint(1, 1000)) for _ in range(100)]
+    b = [Fraction(random.randint(1, 1000), random.randint(1, 1000)) for _ in range(100)]
+    fa, fb = FractionArray.from_fractions(a), FractionArray.from_fractions(b)
+    assert len(fa) == 100 and fa[3] == a[3] and fa[:3].to_fractions() == a[:3]
+
+    for result, expected in [(fa + fb, [x + y for x, y in zip(a, b)]),
+                             (fa - fb, [x - y for x, y in zip(a, b)]),
+                             (fa * fb, [x * y for x, y in zip(a, b)]),
+                             (fa / fb, [x / y for x, y in zip(a, b)]),
+                             (fa * Fraction(3, 4), [x * Fraction(3, 4) for x in a]),
+                             (2 - fa, [2 - x for x in a]),
+                             (1 / fb, [1 / y for y in b])]:
+        assert [(f.numerator, f.denominator) for f in result] == \
+               [(f.numerator, f.denominator) for f in expected]
+
+    assert (fa < fb) == [x < y for x, y in zip(a, b)]
+    assert (fa == fa) == [True] * 100
+    assert fa.sum() == sum(fractions.Fraction(x.numerator, x.denominator) for x in a)
+    assert fa[:10].product() == math.prod(fractions.Fraction(x.numerator, x.denominator) for x in a[:10])
+    assert fa.min() == min(a) and fa.max() == max(a)
+
+    c = FractionArray([4, 3, 3], [6, -4, 1])
+    assert (c.numerators, c.denominators) == ([2, -3, 3], [3, 4, 1])
+    assert repr(c) == 'FractionArray([2/3, -3/4, 3])'
+
+    print('Good fraction arrays')
+
+test_fracarray()
@@ -0,0 +1,476 @@
+# fractran.py
+#
+# A faster Fractran engine.
+#
+# The evaluator in ex7.py multiplies an ever growing integer n by each
+# fraction in turn and checks whether the result is an integer.  But a
+# Fractran program only ever deals with a handful of primes.  Writing
+# every number as a vector of prime exponents,
+#
+#     n = 2**a * 3**b * 5**c * ...      ==>   [a, b, c, ...]
+#
+# turns the program into a register machine: "n*f is an integer" means
+# that every register is at least the exponent of that prime in the
+# denominator of f, and "n = n*f" just adds the numerator's exponents
+# and subtracts the denominator's.  No big integer arithmetic at all.
+#
+#     >>> from ex7 import fibcode
+#     >>> program = compile_program(fibcode)
+#     >>> program.run(78 * 5**9) == 2**55        # fibonacci(10) == 55
+#     True
+
+import json
+import math
+import os
+
+from ex6 import Fraction
+
+def factorize(n):
+    '''
+    Return a dict mapping the prime factors of n to their exponents.
+    '''
+    factors = { }
+    p = 2
+    while p * p <= n:
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+        p += 1 if p == 2 else 2
+    if n > 1:
+        factors[n] = factors.get(n, 0) + 1
+    return factors
+
+class Program:
+    '''
+    A Fractran program compiled into prime-exponent form.
+
+    primes is the list of primes used by the program (register i holds
+    the exponent of primes[i]).  Each instruction is a pair (needs, delta)
+    where needs is a list of (register, exponent) pairs from the
+    denominator and delta is a list of (register, change) pairs.
+    '''
+    def __init__(self, fractions):
+        fractions = [(f.numerator, f.denominator) for f in fractions]
+        self.fractions = fractions
+        primes = set()
+        for n, d in fractions:
+            primes.update(factorize(n))
+            primes.update(factorize(d))
+        self.primes = sorted(primes)
+        index = { p: i for i, p in enumerate(self.primes) }
+
+        self.instructions = [ ]
+        for n, d in fractions:
+            top, bottom = factorize(n), factorize(d)
+            needs = [(index[p], e) for p, e in sorted(bottom.items())]
+            delta = [(index[p], top.get(p, 0) - bottom.get(p, 0))
+                     for p in sorted(set(top) | set(bottom))
+                     if top.get(p, 0) != bottom.get(p, 0)]
+            self.instructions.append((needs, delta))
+
+    def encode(self, n):
+        '''
+        Split n into program registers and the leftover factor made of
+        primes the program never touches.
+        '''
+        registers = [ ]
+        for p in self.primes:
+            e = 0
+            while n % p == 0:
+                n //= p
+                e += 1
+            registers.append(e)
+        return registers, n
+
+    def decode(self, registers, rest=1):
+        return rest * math.prod(p**e for p, e in zip(self.primes, registers) if e)
+
+    def execute(self, registers):
+        '''
+        Run the program on a register vector in place until it halts.
+        '''
+        instructions = self.instructions
+        while True:
+            for needs, delta in instructions:
+                for r, e in needs:
+                    if registers[r] < e:
+                        break
+                else:
+                    for r, change in delta:
+                        registers[r] += change
+                    break
+            else:
+                return registers
+
+    def run(self, n, skip_cycles=True):
+        '''
+        Same as ex7.run(prog, n).  Returns the final value of n as an int.
+        '''
+        registers, rest = self.encode(n)
+        if skip_cycles:
+            self.execute_traced(registers)
+        else:
+            self.execute(registers)
+        return self.decode(registers, rest)
+
+    # -------------------------------------------------------------------------
+    # Tracing and cycle skipping
+    #
+    # Most of the time of a long-running program is spent repeating the same
+    # short sequence of instructions (a loop moving one register into
+    # another, for example).  When the last 2*L instructions executed are
+    # the same sequence of L instructions twice, the loop is applied in bulk:
+    # the number of further repetitions that are guaranteed to go exactly
+    # the same way is worked out from the registers, and the loop's total
+    # delta is added that many times at once.
+
+    def _repeats(self, cycle, delta, registers):
+        '''
+        Number of times the instruction sequence cycle (with total change
+        delta) is guaranteed to run starting from registers, given that it
+        runs at least once.  It may be an underestimate, never an overestimate.
+        '''
+        count = None
+        state = list(registers)
+        for i in cycle:
+            # Instruction i has to keep firing...
+            needs, change = self.instructions[i]
+            for r, e in needs:
+                if delta[r] < 0:
+                    k = (state[r] - e) // -delta[r] + 1
+                    count = k if count is None else min(count, k)
+            # ...and every instruction ahead of it has to stay blocked.
+            for needs, _ in self.instructions[:i]:
+                blocked_until = 0
+                for r, e in needs:
+                    if state[r] < e:
+                        if delta[r] <= 0:
+                            break                # Blocked for good
+                        blocked_until = max(blocked_until, -((state[r] - e) // delta[r]))
+                else:
+                    count = blocked_until if count is None else min(count, blocked_until)
+            for r, c in change:
+                state[r] += c
+        return count
+
+    def execute_traced(self, registers, profile=None, skip_cycles=True, max_cycle=32):
+        '''
+        Like execute(), but counts steps and instruction hits in profile
+        (a Profile instance) and, if skip_cycles is set, applies repeating
+        instruction cycles in bulk.
+        '''
+        if profile is None:
+            profile = Profile(len(self.instructions))
+        instructions = self.instructions
+        hits = profile.hits
+        history = [ ]
+        last_seen = { }
+        while True:
+            for i, (needs, delta) in enumerate(instructions):
+                for r, e in needs:
+                    if registers[r] < e:
+                        break
+                else:
+                    for r, change in delta:
+                        registers[r] += change
+                    break
+            else:
+                return registers
+
+            t = len(history)
+            history.append(i)
+            hits[i] += 1
+            profile.steps += 1
+            if not skip_cycles:
+                continue
+
+            prev = last_seen.get(i)
+            last_seen[i] = t
+            if prev is None:
+                continue
+            L = t - prev
+            if L > max_cycle or prev < L or history[prev - L] != i:
+                continue
+            cycle = history[t - L + 1:]
+            if history[prev - L + 1:prev + 1] != cycle:
+                continue
+
+            # Total change made by one pass of the cycle
+            delta = [0] * len(registers)
+            for j in cycle:
+                for r, change in instructions[j][1]:
+                    delta[r] += change
+            # Registers at the start of the pass that just finished
+            start = [x - d for x, d in zip(registers, delta)]
+            count = self._repeats(cycle, delta, start)
+            if count is None:
+                raise RuntimeError(f'Program loops forever repeating instructions {cycle}')
+            extra = count - 1
+            if extra > 0:
+                for r, d in enumerate(delta):
+                    registers[r] += d * extra
+                for j in cycle:
+                    hits[j] += extra
+                profile.steps += extra * L
+                profile.skipped += extra * L
+                profile.cycles += 1
+            # Start over so the same cycle isn't matched against stale history
+            history.clear()
+            last_seen.clear()
+
+    def profile(self, n, skip_cycles=True):
+        '''
+        Run the program on n.  Returns (result, profile).
+        '''
+        registers, rest = self.encode(n)
+        profile = Profile(len(self.instructions))
+        self.execute_traced(registers, profile, skip_cycles)
+        return self.decode(registers, rest), profile
+
+class Profile:
+    '''
+    Execution statistics.  steps is the total number of instructions
+    executed (including ones applied in bulk), hits[i] is how many times
+    instruction i fired, cycles is how many loops were skipped and
+    skipped is how many steps they accounted for.
+    '''
+    def __init__(self, size):
+        self.steps = 0
+        self.hits = [0] * size
+        self.cycles = 0
+        self.skipped = 0
+
+    def __repr__(self):
+        return f'Profile(steps={self.steps}, cycles={self.cycles}, skipped={self.skipped})'
+
+    def report(self, fractions=None):
+        '''
+        Print a histogram of instruction hits.
+        '''
+        print(f'{self.steps} steps ({self.skipped} in {self.cycles} skipped cycles)')
+        width = max(self.hits) or 1
+        for i, count in enumerate(self.hits):
+            label = str(fractions[i]) if fractions else f'#{i}'
+            bar = '#' * round(40 * count / width)
+            print(f'{label:>10s} {count:12d} {bar}')
+
+# -----------------------------------------------------------------------------
+# Streaming execution
+#
+# A Run is a program together with its current registers.  Iterating over
+# it executes one instruction at a time and yields the intermediate
+# states, so the interesting ones can be picked out as they happen.
+# Conway's PRIMEGAME, for example, produces the primes as the exponents
+# of the powers of 2 that appear along the way:
+#
+#     >>> run = Run(compile_program(PRIMEGAME), 2)
+#     >>> primes = run.powers_of(2)
+#     >>> [next(primes) for _ in range(5)]
+#     [2, 3, 5, 7, 11]
+#
+# A Run can be saved to disk at any point (save()) and picked up again
+# later with Run.load(), even in another process.  Passing checkpoint=
+# to states() saves automatically every so many steps.
+
+class Run:
+    def __init__(self, program, n=1):
+        self.program = program
+        self.registers, self.rest = program.encode(n)
+        self.steps = 0
+        self.halted = False
+
+    @property
+    def value(self):
+        return self.program.decode(self.registers, self.rest)
+
+    def states(self, checkpoint=None, every=1_000_000):
+        '''
+        Execute the program one instruction at a time, yielding the
+        register list after each step.  The same list is yielded every
+        time, so copy it if you want to keep it.  If checkpoint is a
+        filename, the run is saved there every `every` steps and when
+        the program halts.
+        '''
+        instructions = self.program.instructions
+        registers = self.registers
+        while not self.halted:
+            for needs, delta in instructions:
+                for r, e in needs:
+                    if registers[r] < e:
+                        break
+                else:
+                    for r, change in delta:
+                        registers[r] += change
+                    break
+            else:
+                self.halted = True
+                if checkpoint:
+                    self.save(checkpoint)
+                return
+            self.steps += 1
+            if checkpoint and self.steps % every == 0:
+                self.save(checkpoint)
+            yield registers
+
+    def __iter__(self):
+        '''
+        Yield the value of n after each step.
+        '''
+        for registers in self.states():
+            yield self.program.decode(registers, self.rest)
+
+    def powers_of(self, p, **kwargs):
+        '''
+        Yield k each time n becomes exactly p**k.  Keyword arguments are
+        passed on to states().
+        '''
+        if self.rest != 1 or p not in self.program.primes:
+            return
+        index = self.program.primes.index(p)
+        for registers in self.states(**kwargs):
+            if registers[index] and not any(registers[:index]) and not any(registers[index+1:]):
+                yield registers[index]
+
+    def save(self, filename):
+        '''
+        Write the program and its current state to filename (JSON).  The
+        file is replaced atomically so a crash never leaves a partial one.
+        '''
+        state = {
+            'fractions': self.program.fractions,
+            'registers': self.registers,
+            'rest': self.rest,
+            'steps': self.steps,
+            'halted': self.halted,
+        }
+        with open(filename + '.tmp', 'w') as file:
+            json.dump(state, file)
+        os.replace(filename + '.tmp', filename)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename) as file:
+            state = json.load(file)
+        self = object.__new__(cls)
+        self.program = Program([Fraction(n, d) for n, d in state['fractions']])
+        self.registers = state['registers']
+        self.rest = state['rest']
+        self.steps = state['steps']
+        self.halted = state['halted']
+        return self
+
+# Conway's prime generating program
+PRIMEGAME = [
+    Fraction(17, 91), Fraction(78, 85), Fraction(19, 51), Fraction(23, 38),
+    Fraction(29, 33), Fraction(77, 29), Fraction(95, 23), Fraction(77, 19),
+    Fraction(1, 17), Fraction(11, 13), Fraction(13, 11), Fraction(15, 14),
+    Fraction(15, 2), Fraction(55, 1),
+    ]
+
+def compile_program(fractions):
+    return Program(fractions)
+
+def run(prog, n):
+    '''
+    Drop-in replacement for ex7.run().  Compiles prog on every call, so
+    hold on to a compiled Program if you run the same code repeatedly.
+    '''
+    return compile_program(prog).run(n)
+
+def test_fractran():
+    import ex7
+    from ex6 import Fraction
+
+    assert factorize(2233) == { 7: 1, 11: 1, 29: 1 }
+    assert factorize(1) == { }
+
+    program = compile_program(ex7.fibcode)
+    for n in range(1, 12):
+        start = 78 * 5**(n - 1)
+        assert program.run(start) == int(ex7.run(ex7.fibcode, start))
+
+    # A prime the program never uses passes through unchanged
+    assert program.run(78 * 5**4 * 101) == int(ex7.run(ex7.fibcode, 78 * 5**4 * 101))
+
+    # Adder: 2**a * 3**b -> 3**(a+b)
+    assert run([Fraction(3, 2)], 2**5 * 3**7) == 3**12
+
+    # Profiling, with and without skipping cycles
+    for n in range(1, 12):
+        start = 78 * 5**(n - 1)
+        result, slow = program.profile(start, skip_cycles=False)
+        assert result == program.run(start, skip_cycles=False)
+        result, fast = program.profile(start)
+        assert result == program.run(start)
+        assert (fast.steps, fast.hits) == (slow.steps, slow.hits)
+        assert slow.skipped == 0 and sum(slow.hits) == slow.steps
+    assert fast.skipped > fast.steps // 2
+
+    # Skipping cycles in a multiplier: 2**a * 3**b -> 5**(a*b)
+    multiply = [Fraction(455, 33), Fraction(11, 13), Fraction(1, 11), Fraction(3, 7),
+                Fraction(11, 2), Fraction(1, 3)]
+    mul = compile_program(multiply)
+    result, fast = mul.profile(2**40 * 3**50)
+    assert result == 5**2000
+    _, slow = mul.profile(2**40 * 3**50, skip_cycles=False)
+    assert (fast.steps, fast.hits) == (slow.steps, slow.hits)
+    assert fast.cycles > 0
+
+    # Streaming
+    r = Run(program, 78 * 5**4)
+    values = list(r)
+    assert r.halted and r.steps == len(values)
+    assert values[-1] == program.run(78 * 5**4) == r.value
+    assert values[0] == int(Fraction(78 * 5**4) * Fraction(17, 65))
+
+    primes = Run(compile_program(PRIMEGAME), 2).powers_of(2)
+    assert [next(primes) for _ in range(6)] == [2, 3, 5, 7, 11, 13]
+
+    # Checkpoint part way through and resume from the file
+    import tempfile
+    with tempfile.TemporaryDirectory() as dirname:
+        filename = os.path.join(dirname, 'primes.json')
+        run1 = Run(compile_program(PRIMEGAME), 2)
+        primes = run1.powers_of(2, checkpoint=filename, every=500)
+        assert [next(primes) for _ in range(4)] == [2, 3, 5, 7]
+        assert run1.steps == 707
+
+        # The automatic checkpoint was made at step 500, before 7 turned up
+        run2 = Run.load(filename)
+        assert run2.steps == 500
+        primes = run2.powers_of(2)
+        assert [next(primes) for _ in range(3)] == [7, 11, 13]
+
+        # An explicit save picks up exactly where it left off
+        run1.save(filename)
+        run3 = Run.load(filename)
+        primes = run3.powers_of(2)
+        assert [next(primes) for _ in range(2)] == [11, 13]
+        assert run3.steps == run2.steps
+
+    try:
+        compile_program([Fraction(3, 2), Fraction(2, 3)]).profile(2)
+        assert False, 'expected RuntimeError'
+    except RuntimeError:
+        pass
+
+    print('Good fractran')
+
+test_fractran()
+
+def benchmark(n=20):
+    import time
+    import ex7
+    program = compile_program(ex7.fibcode)
+    start = 78 * 5**(n - 1)
+    results = { }
+    for name, func in [('ex7.run', lambda: int(ex7.run(ex7.fibcode, start))),
+                       ('compiled', lambda: program.run(start, skip_cycles=False)),
+                       ('compiled + cycles', lambda: program.run(start))]:
+        t = time.perf_counter()
+        results[name] = func()
+        print(f'fibonacci({n}) {name:>20s}: {time.perf_counter() - t:.4f}s')
+    assert len(set(results.values())) == 1
+
+if __name__ == '__main__':
+    benchmark()
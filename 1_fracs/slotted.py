@@ -0,0 +1,230 @@
+# slotted.py
+#
+# A compact version of the Fraction class from ex6.py.
+#
+# Every instance of ex6.Fraction carries its own __dict__ to hold the
+# numerator and denominator.  That's a lot of overhead if you're
+# holding millions of them.  This version uses __slots__ instead, is
+# immutable (so it can safely be hashed and used as a dict key), and
+# otherwise supports the same operators and legacy functions.
+#
+# See bench.py for a memory/speed comparison with the other fraction
+# representations in this project.
+
+import math
+import operator
+
+from ex6 import _parts, hash_fraction
+
+class Fraction:
+    __slots__ = ('_numerator', '_denominator')
+
+    def __init__(self, numerator, denominator=1):
+        if denominator != 1:
+            if denominator < 0:
+                numerator, denominator = -numerator, -denominator
+            elif denominator == 0:
+                raise ZeroDivisionError(f'Fraction({numerator}, 0)')
+            d = math.gcd(numerator, denominator)
+            if d != 1:
+                numerator //= d
+                denominator //= d
+        self._numerator = numerator
+        self._denominator = denominator
+
+    @classmethod
+    def _from_reduced(cls, numerator, denominator):
+        self = object.__new__(cls)
+        self._numerator = numerator
+        self._denominator = denominator
+        return self
+
+    # Read-only attributes.  As with fractions.Fraction, the underscore
+    # names are private and never change after construction.
+    @property
+    def numerator(self):
+        return self._numerator
+
+    @property
+    def denominator(self):
+        return self._denominator
+
+    # Operators.  The other operand can be anything with numerator and
+    # denominator attributes (ints, ex6.Fraction, fractions.Fraction, ...)
+    def __add__(self, other):
+        return Fraction(self._numerator * other.denominator + self._denominator * other.numerator, self._denominator * other.denominator)
+
+    def __sub__(self, other):
+        return Fraction(self._numerator * other.denominator - self._denominator * other.numerator, self._denominator * other.denominator)
+
+    def __mul__(self, other):
+        return Fraction(self._numerator * other.numerator, self._denominator * other.denominator)
+
+    def __truediv__(self, other):
+        return Fraction(self._numerator * other.denominator, self._denominator * other.numerator)
+
+    # Ints take a shortcut: adding a multiple of the denominator can't
+    # introduce a common factor.  Anything else goes through the checks.
+    def __radd__(self, other):
+        if type(other) is int:
+            return Fraction._from_reduced(self._numerator + other * self._denominator, self._denominator)
+        n, d = _parts(other)
+        return Fraction(n * self._denominator + d * self._numerator, d * self._denominator)
+
+    def __rsub__(self, other):
+        if type(other) is int:
+            return Fraction._from_reduced(other * self._denominator - self._numerator, self._denominator)
+        n, d = _parts(other)
+        return Fraction(n * self._denominator - d * self._numerator, d * self._denominator)
+
+    def __rmul__(self, other):
+        return Fraction(self._numerator * other, self._denominator)
+
+    def __rtruediv__(self, other):
+        return Fraction(other * self._denominator, self._numerator)
+
+    # Comparison operators.  Comparing with something that isn't a number
+    # returns NotImplemented, so equality is just False and fractions can
+    # be mixed with other dict keys.  Floats are compared exactly, except
+    # inf and nan which behave as they do against any finite float.
+    def _compare(self, other, op):
+        if type(other) is float and not math.isfinite(other):
+            return op(0.0, other)
+        try:
+            n2, d2 = _parts(other)
+        except AttributeError:
+            return NotImplemented
+        return op(self._numerator * d2, self._denominator * n2)
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+    def __ne__(self, other):
+        return self._compare(other, operator.ne)
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    def __hash__(self):
+        return hash_fraction(self._numerator, self._denominator)
+
+    # Niceties
+    def __str__(self):
+        if self._denominator == 1:
+            return f"{self._numerator}"
+        else:
+            return f"{self._numerator}/{self._denominator}"
+
+    def __repr__(self):
+        return f"Fraction({self._numerator}, {self._denominator})"
+
+    def __float__(self):
+        return self._numerator / self._denominator
+
+    def __int__(self):
+        return self._numerator // self._denominator
+
+    # Immutable, so copies can just be the same object
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (Fraction._from_reduced, (self._numerator, self._denominator))
+
+# Legacy interface
+def make_frac(numerator, denominator):
+    return Fraction(numerator, denominator)
+
+def numerator(f):
+    return f.numerator
+
+def denominator(f):
+    return f.denominator
+
+def add_frac(a, b):
+    return a + b
+
+def sub_frac(a, b):
+    return a - b
+
+def mul_frac(a, b):
+    return a * b
+
+def div_frac(a, b):
+    return a / b
+
+# The old unit tests must still pass (legacy code)
+def test_frac():
+    a = make_frac(4, 6)
+    assert (numerator(a), denominator(a)) == (2, 3)
+
+    b = make_frac(-3, -4)
+    assert (numerator(b), denominator(b)) == (3, 4)
+
+    c = make_frac(3, -4)
+    assert (numerator(c), denominator(c)) == (-3, 4)
+
+    d = add_frac(a, b)
+    assert (numerator(d), denominator(d)) == (17, 12)
+
+    e = sub_frac(a, b)
+    assert (numerator(e), denominator(e)) == (-1, 12)
+
+    f = mul_frac(a, b)
+    assert (numerator(f), denominator(f)) == (1, 2)
+
+    g = div_frac(a, b)
+    assert (numerator(g), denominator(g)) == (8, 9)
+
+    print("Good fractions")
+
+test_frac()
+
+def test_compact():
+    import fractions
+    import pickle
+
+    a = Fraction(4, 6)
+    assert not hasattr(a, '__dict__')
+    try:
+        a.numerator = 5
+        assert False, 'expected AttributeError'
+    except AttributeError:
+        pass
+
+    # Same hash as equal ints and fractions.Fraction values
+    assert hash(Fraction(4, 2)) == hash(2)
+    assert hash(Fraction(-1, 2)) == hash(fractions.Fraction(-1, 2)) == hash(-0.5)
+    assert len({ Fraction(1, 2), Fraction(2, 4), Fraction(3, 4) }) == 2
+
+    assert (a + 1, 1 - a, a * 10, 1 / a) == (Fraction(5, 3), Fraction(1, 3), Fraction(20, 3), Fraction(3, 2))
+    assert pickle.loads(pickle.dumps(a)) == a
+    assert str(a) == '2/3' and repr(a) == 'Fraction(2, 3)'
+
+    # Non-numbers are never equal and can't be ordered
+    half = Fraction(1, 2)
+    assert half != None and half != 'x' and not half == 'x'
+    assert { half: 'half', 'x': 'y', None: 'none' }[None] == 'none'
+    try:
+        half < 'x'
+        assert False, 'expected TypeError'
+    except TypeError:
+        pass
+    assert half < 0.6 and half == 0.5 and half <= 0.5 and Fraction(1, 3) != 1/3
+    assert half < float('inf') and half != float('nan') and not half < float('nan')
+
+    # Reflected add/subtract with anything but an int is reduced
+    for x, expected in [(0.5 + half, (1, 1)), (0.25 - half, (-1, 4)),
+                        (2 + half, (5, 2)), (1 - half, (1, 2))]:
+        assert type(x) is Fraction and (x.numerator, x.denominator) == expected, x
+
+    print('Compact fractions')
+
+test_compact()
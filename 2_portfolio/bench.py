@@ -0,0 +1,117 @@
+# bench.py
+#
+# Timing comparisons for the different portfolio representations.
+# Run it directly, optionally giving the portfolio sizes to try:
+#
+#     bash $ python bench.py
+#     bash $ python bench.py 10000 1000000 10000000
+#
+# Sizes are number of holdings.  The largest ones need a lot of memory
+# for the list of Holding instances.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import portfolio
+import report
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def make_rows(count):
+    random.seed(0)
+    names = [f'S{i:04d}' for i in range(5000)]
+    return ([random.choice(names) for _ in range(count)],
+            [random.randint(1, 1000) for _ in range(count)],
+            [round(random.uniform(1, 500), 2) for _ in range(count)])
+
+def bench_pandas(count):
+    names, shares, prices = make_rows(count)
+    holdings = [portfolio.Holding(*row) for row in zip(names, shares, prices)]
+    frame = portfolio.PandasPortfolio.from_columns(names, shares, prices)
+
+    tasks = [
+        ('total value',
+         lambda: sum(h.shares * h.price for h in holdings),
+         lambda: frame.total_value()),
+        ('sort by value',
+         lambda: sorted(holdings, key=lambda h: h.shares * h.price, reverse=True),
+         lambda: frame.sort_by_value(reverse=True)),
+        ('top 10 by value',
+         lambda: report.top_by_value(holdings, 10),
+         lambda: report.top_by_value(frame, 10)),
+        ('filter value > 100000',
+         lambda: [h for h in holdings if h.shares * h.price > 100000],
+         lambda: frame.filter(frame.value > 100000)),
+    ]
+    print(f'{count} holdings')
+    for title, slow, fast in tasks:
+        list_time, _ = timed(slow)
+        frame_time, _ = timed(fast)
+        print(f'    {title:>24s}: list {list_time:8.4f}s  PandasPortfolio {frame_time:8.4f}s')
+
+def bench_report(count):
+    names, shares, prices = make_rows(count)
+
+    def print_rows(holdings, file):
+        # The original make_report(): one print() per holding
+        print('{:>10} {:>10} {:>10} {:>10}'.format('name','shares','price','value'), file=file)
+        print(('-'*10 + ' ')*4, file=file)
+        total_value = 0.0
+        for holding in holdings:
+            value = holding.shares*holding.price
+            total_value += value
+            print(f'{holding.name:>10s} {holding.shares:10d} {holding.price:10.2f} {value:10.2f}', file=file)
+        print(file=file)
+        print(f'Total value: {total_value:0.2f}', file=file)
+
+    tasks = [('print() per row', print_rows)]
+    for fmt in report.FORMATS:
+        tasks.append((f'write_report {fmt}', lambda holdings, file, fmt=fmt: report.write_report(holdings, file, fmt)))
+    print(f'report {count} holdings')
+    for title, func in tasks:
+        # Fresh holdings for every task so none of them benefits from another
+        holdings = [portfolio.Holding(*row) for row in zip(names, shares, prices)]
+        with tempfile.TemporaryFile('w') as file:
+            elapsed, _ = timed(lambda: func(holdings, file))
+        print(f'    {title:>24s}: {elapsed:8.4f}s {count / elapsed:12,.0f} rows/sec')
+
+def write_csv(filename, count):
+    names, shares, prices = make_rows(count)
+    with open(filename, 'w') as file:
+        file.write('name,shares,price\n')
+        for row in zip(names, shares, prices):
+            file.write('%s,%d,%.2f\n' % row)
+
+# Readers to compare.  Each takes a filename and returns a portfolio.
+READERS = [
+    ('read_portfolio_as_classes', portfolio.read_portfolio_as_classes),
+    ('read_portfolio_as_columns', portfolio.read_portfolio_as_columns),
+    ('read_portfolio_parallel', portfolio.read_portfolio_parallel),
+    ('read_portfolio_blocks', portfolio.read_portfolio_blocks),
+    # The first call parses the CSV and writes a snapshot, the second loads it
+    ('read_portfolio_cached (miss)', portfolio.read_portfolio_cached),
+    ('read_portfolio_cached (hit)', portfolio.read_portfolio_cached),
+]
+
+def bench_loading(count):
+    with tempfile.TemporaryDirectory() as dirname:
+        filename = os.path.join(dirname, 'portfolio.csv')
+        write_csv(filename, count)
+        print(f'load {count} holdings ({os.path.getsize(filename) / 1e6:.1f} MB, {os.cpu_count()} CPUs)')
+        for title, reader in READERS:
+            elapsed, result = timed(lambda: reader(filename))
+            assert len(result) == count
+            print(f'    {title:>32s}: {elapsed:8.4f}s')
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 1_000_000, 10_000_000]
+    for count in sizes:
+        bench_pandas(count)
+        bench_report(count)
+        bench_loading(count)
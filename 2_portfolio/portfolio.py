@@ -4,7 +4,26 @@
 # "name,shares,price" data into a list of dictionaries.  The file
 # `report.py` uses this function.   We'll make some modifications
 # in exercises below.
+import os
+import struct
+import sys
+import tempfile
+from array import array
 from dataclasses import dataclass
+from itertools import repeat
+from operator import mul
+
+# numpy and pandas are optional.  Only PandasPortfolio needs them.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
 def read_portfolio(filename):
     '''
     Read a CSV file of name, shares, price data into a list of dicts.
@@ -39,6 +58,40 @@ def read_portfolio_as_classes(filename):
             portfolio.append(holding)
     return portfolio
 
+def iter_portfolio(filename, chunk_size=1024*1024):
+    '''
+    Lazily read a CSV file of name, shares, price data, yielding one
+    Holding at a time.  The file is read in chunks of chunk_size
+    characters so memory use stays the same no matter how big it is.
+    '''
+    with open(filename, "r") as file:
+        # Skip the first line of headers (an empty file has none)
+        next(file, None)
+        leftover = ''
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            lines = (leftover + chunk).split('\n')
+            # The last piece may be a partial line. Keep it for the next chunk.
+            leftover = lines.pop()
+            for line in lines:
+                if line:
+                    name, shares, price = line.split(',')
+                    yield Holding(name, int(shares), float(price))
+        if leftover:
+            name, shares, price = leftover.split(',')
+            yield Holding(name, int(shares), float(price))
+
+def total_value(holdings):
+    '''
+    Total value of holdings.  Works with any iterable, including iter_portfolio().
+    '''
+    return sum(h.shares * h.price for h in holdings)
+
+def total_shares(holdings):
+    return sum(h.shares for h in holdings)
+
 # -----------------------------------------------------------------------------
 # Exercise 1:  Classes vs. Dicts
 #
@@ -85,6 +138,517 @@ class Holding:
     name: str
     shares: int
     price: float
+
+    def __init__(self, name, shares, price):
+        # Fill in __dict__ directly.  Going through __setattr__ below
+        # would make creating a Holding twice as slow.
+        attrs = self.__dict__
+        attrs['name'] = name
+        attrs['shares'] = shares
+        attrs['price'] = price
+        attrs['value'] = shares * price
+
+    def __setattr__(self, name, value):
+        # value is stored, not computed, so keep it up to date
+        object.__setattr__(self, name, value)
+        if name in ('shares', 'price'):
+            self.__dict__['value'] = self.shares * self.price
+
+def _values_and_totals(name_count, name_ids, shares, prices):
+    '''
+    Return (values, (name_shares, name_values)) for columns of holdings:
+    the value of each row and the shares and value summed by name id.
+    '''
+    values = array('d', map(mul, shares, prices))
+    name_shares = [0] * name_count
+    name_values = [0.0] * name_count
+    for index, count, value in zip(name_ids, shares, values):
+        name_shares[index] += count
+        name_values[index] += value
+    return values, (name_shares, name_values)
+
+class Portfolio:
+    '''
+    A portfolio stored as columns instead of one object per holding.
+    Names are interned in a table and referenced by number, shares and
+    prices are packed into typed arrays.  That's about 30 bytes per
+    holding instead of a couple hundred for a Holding instance.
+
+    Iterating produces HoldingView objects that read from the columns,
+    so code written for a list of Holding instances (e.g., make_report())
+    works unchanged.
+
+    The value of each holding is kept in its own column, and running
+    totals (overall and per name) are updated as holdings are added and
+    removed, so total_value(), total_shares() and name_totals() don't
+    have to look at the rows.  The float totals are running sums and
+    can drift from a fresh sum() by a rounding error or two.
+    '''
+    def __init__(self, holdings=()):
+        self._names = [ ]                # Name table
+        self._name_ids = { }             # name -> index into _names
+        self._name_column = array('I')
+        self._shares = array('q')
+        self._prices = array('d')
+        self._values = array('d')        # shares * price
+        self._name_shares = [ ]          # Totals, indexed like _names
+        self._name_values = [ ]
+        self._total_shares = 0
+        self._total_value = 0.0
+        for h in holdings:
+            self.append(h.name, h.shares, h.price)
+
+    def _intern(self, name):
+        index = self._name_ids.get(name)
+        if index is None:
+            index = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+            self._name_shares.append(0)
+            self._name_values.append(0.0)
+        return index
+
+    # Attributes holding typed arrays
+    _columns = [('_name_column', 'I'), ('_shares', 'q'), ('_prices', 'd'), ('_values', 'd')]
+
+    def _writable(self):
+        # Columns loaded from a snapshot are read-only views of the file.
+        # Copy them into arrays before changing anything.
+        if not isinstance(self._shares, array):
+            for attr, typecode in self._columns:
+                column = array(typecode)
+                column.frombytes(getattr(self, attr).cast('B'))
+                setattr(self, attr, column)
+
+    def append(self, name, shares, price):
+        self._writable()
+        index = self._intern(name)
+        value = shares * price
+        self._name_column.append(index)
+        self._shares.append(shares)
+        self._prices.append(price)
+        self._values.append(value)
+        self._name_shares[index] += shares
+        self._name_values[index] += value
+        self._total_shares += shares
+        self._total_value += value
+
+    def _extend(self, names, name_ids, shares, prices, values=None, totals=None):
+        # Append columns from another name table (e.g., a chunk parsed
+        # elsewhere).  name_ids index into names.  values and totals (as
+        # returned by _values_and_totals()) are computed if not given.
+        self._writable()
+        if values is None:
+            values, totals = _values_and_totals(len(names), name_ids, shares, prices)
+        mapping = [self._intern(name) for name in names]
+        self._name_column.extend(name_ids if mapping == list(range(len(mapping)))
+                                 else array('I', [mapping[i] for i in name_ids]))
+        self._shares.extend(shares)
+        self._prices.extend(prices)
+        self._values.extend(values)
+
+        # Totals only need updating once per name, not once per row
+        chunk_shares, chunk_values = totals
+        for index, count, value in zip(mapping, chunk_shares, chunk_values):
+            self._name_shares[index] += count
+            self._name_values[index] += value
+        self._total_shares += sum(chunk_shares)
+        self._total_value += sum(chunk_values)
+
+    def pop(self, index=-1):
+        '''
+        Remove the holding at index and return it as a Holding.
+        '''
+        self._writable()
+        holding = self[index].to_holding()
+        if index < 0:
+            index += len(self)
+        name_id = self._name_column[index]
+        value = self._values[index]
+        for column in (self._name_column, self._shares, self._prices, self._values):
+            del column[index]
+        self._name_shares[name_id] -= holding.shares
+        self._name_values[name_id] -= value
+        self._total_shares -= holding.shares
+        self._total_value -= value
+        if not self._shares:
+            self._total_value = 0.0
+        return holding
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+    def __len__(self):
+        return len(self._shares)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Like a list, a slice is a new Portfolio
+            portfolio = Portfolio()
+            portfolio._extend(self._names, self._name_column[index],
+                              self._shares[index], self._prices[index])
+            return portfolio
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('portfolio index out of range')
+        return HoldingView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield HoldingView(self, index)
+
+    def __repr__(self):
+        return f'<Portfolio: {len(self)} holdings>'
+
+    # Column access
+    def names(self):
+        return [self._names[i] for i in self._name_column]
+
+    @property
+    def shares(self):
+        return self._shares
+
+    @property
+    def prices(self):
+        return self._prices
+
+    @property
+    def values(self):
+        return self._values
+
+    # Aggregates
+    def total_value(self):
+        return self._total_value
+
+    def total_shares(self):
+        return self._total_shares
+
+    def name_totals(self, name):
+        '''
+        Return (shares, value) summed over all holdings of name.
+        '''
+        index = self._name_ids.get(name)
+        if index is None:
+            return 0, 0.0
+        return self._name_shares[index], self._name_values[index]
+
+class HoldingView:
+    '''
+    One row of a Portfolio.  Looks like a Holding, but doesn't copy anything.
+    '''
+    __slots__ = ('_portfolio', '_index')
+
+    def __init__(self, portfolio, index):
+        self._portfolio = portfolio
+        self._index = index
+
+    @property
+    def name(self):
+        p = self._portfolio
+        return p._names[p._name_column[self._index]]
+
+    @property
+    def shares(self):
+        return self._portfolio._shares[self._index]
+
+    @property
+    def price(self):
+        return self._portfolio._prices[self._index]
+
+    @property
+    def value(self):
+        return self._portfolio._values[self._index]
+
+    def to_holding(self):
+        return Holding(self.name, self.shares, self.price)
+
+    def __repr__(self):
+        return f'HoldingView(name={self.name!r}, shares={self.shares!r}, price={self.price!r})'
+
+def read_portfolio_as_columns(filename):
+    '''
+    Read a CSV file of name, shares, price data into a columnar Portfolio.
+    '''
+    portfolio = Portfolio()
+    for holding in iter_portfolio(filename):
+        portfolio.append(holding.name, holding.shares, holding.price)
+    return portfolio
+
+# Parallel loading.  The file is cut into byte ranges that start and end
+# on line boundaries and each range is parsed by a separate process.
+# The workers send back compact columns (a name table plus arrays) that
+# are then appended to a single Portfolio.
+
+def _byte_ranges(filename, count):
+    '''
+    Split the data lines of filename (everything after the header) into
+    at most count (start, end) byte ranges aligned to newlines.
+    '''
+    with open(filename, 'rb') as file:
+        file.readline()
+        start = file.tell()
+        size = file.seek(0, 2)
+        offsets = [start]
+        for i in range(1, count):
+            file.seek(start + (size - start) * i // count)
+            file.readline()
+            offsets.append(min(file.tell(), size))
+        offsets.append(size)
+    return [(lo, hi) for lo, hi in zip(offsets, offsets[1:]) if hi > lo]
+
+class _NameIds(dict):
+    # Maps name (bytes) -> id, assigning new ids on first sight
+    def __init__(self):
+        self.names = [ ]
+
+    def __missing__(self, key):
+        index = self[key] = len(self.names)
+        self.names.append(key.decode())
+        return index
+
+def _parse_lines(data, ids, name_ids, shares, prices):
+    '''
+    Parse complete "name,shares,price" lines in the bytes data, appending
+    to the given columns.  ids is a _NameIds table.  Blank lines are
+    skipped and any other line without exactly three fields is an error.
+    Once the lines are checked, the whole block is split into fields at
+    once and each column is converted in one go.
+    '''
+    lines = [line for line in data.split(b'\n') if line]
+    if set(map(bytes.count, lines, repeat(b','))) - {2}:
+        bad = next(line for line in lines if line.count(b',') != 2)
+        raise ValueError(f'Malformed portfolio line (expected name,shares,price): {bad[:80]!r}')
+    fields = b','.join(lines).split(b',')
+    name_ids.extend(map(ids.__getitem__, fields[0::3]))
+    shares.extend(map(int, fields[1::3]))
+    prices.extend(map(float, fields[2::3]))
+
+def _parse_range(filename, start, end):
+    '''
+    Parse the lines in the byte range [start, end) of filename.  Returns
+    (names, name_ids, shares, prices, values, totals) with names being
+    the distinct names in the range.  Working out the values and totals
+    here leaves the process merging the results less to do.
+    '''
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    ids = _NameIds()
+    name_ids = array('I')
+    shares = array('q')
+    prices = array('d')
+    _parse_lines(data, ids, name_ids, shares, prices)
+    return (ids.names, name_ids, shares, prices,
+            *_values_and_totals(len(ids.names), name_ids, shares, prices))
+
+def read_portfolio_parallel(filename, workers=None):
+    '''
+    Read a CSV file of name, shares, price data into a Portfolio using a
+    pool of worker processes (os.cpu_count() of them by default).
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    ranges = _byte_ranges(filename, workers)
+    portfolio = Portfolio()
+    if workers == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            portfolio._extend(*_parse_range(filename, start, end))
+        return portfolio
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_parse_range, filename, start, end) for start, end in ranges]
+        # Merge in file order so the rows come out as they appear in the file
+        for future in futures:
+            portfolio._extend(*future.result())
+    return portfolio
+
+# Block loading.  Rather than decoding every line into a str and
+# splitting it, the file is read as bytes in large blocks of whole lines
+# and each block is parsed with _parse_lines().  Only the distinct names
+# are ever decoded into strings.
+
+def read_portfolio_blocks(filename, block_size=1024*1024):
+    '''
+    Read a CSV file of name, shares, price data into a Portfolio, about
+    block_size bytes at a time.  Every line must have exactly three fields.
+    '''
+    ids = _NameIds()
+    name_ids = array('I')
+    shares = array('q')
+    prices = array('d')
+    with open(filename, 'rb') as file:
+        file.readline()
+        while True:
+            block = file.read(block_size)
+            if not block:
+                break
+            # Finish off the last line so the block ends on a line boundary
+            block += file.readline()
+            _parse_lines(block, ids, name_ids, shares, prices)
+
+    portfolio = Portfolio()
+    portfolio._extend(ids.names, name_ids, shares, prices)
+    return portfolio
+
+# Binary snapshots.  Parsing the same CSV file over and over is a waste.
+# A snapshot stores a Portfolio in a form that can be memory-mapped and
+# used directly:
+#
+#     header        magic, version, row count, name count, size of the
+#                   string table, the mtime/size of the CSV file it was
+#                   made from, total shares and total value
+#     name lengths  uint32 per name  (bytes of each name in the string table)
+#     string table  the distinct names, UTF-8, one after the other
+#     name ids      uint32 per row   (index into the string table)
+#     shares        int64 per row
+#     prices        float64 per row
+#     values        float64 per row
+#     name shares   int64 per name   (totals by name)
+#     name values   float64 per name
+#
+# Sections are padded to 8 bytes.  All numbers are little-endian.
+# Loading a snapshot only decodes the string table; the columns are
+# views of the mapped file (or byte-swapped copies on big-endian machines).
+
+SNAPSHOT_MAGIC = b'PORTSNAP'
+SNAPSHOT_VERSION = 3
+_SNAPSHOT_HEADER = struct.Struct('<8sIIQQQQQqd')
+
+def _padding(size):
+    return -size % 8
+
+def _little_endian(column, typecode):
+    # Bytes of column (an array, memoryview or list) in little-endian order
+    if sys.byteorder == 'little' and not isinstance(column, list):
+        return bytes(column)
+    column = array(typecode, column)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+def write_snapshot(portfolio, filename, source=None):
+    '''
+    Write portfolio (a Portfolio) to filename as a binary snapshot.  If
+    source is given, it's the name of the CSV file the data came from
+    and its mtime/size are recorded so the snapshot can be checked for
+    staleness later.
+    '''
+    mtime, size = 0, 0
+    if source:
+        st = os.stat(source)
+        mtime, size = st.st_mtime_ns, st.st_size
+    names = [name.encode() for name in portfolio._names]
+    strings = b''.join(names)
+    header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(portfolio),
+                                   len(names), len(strings), mtime, size,
+                                   portfolio._total_shares, portfolio._total_value)
+    # Each writer gets its own temporary file, so two processes refreshing
+    # the same snapshot can't write into each other's data
+    fd, tmpname = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(filename) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(header)
+            sections = [_little_endian(list(map(len, names)), 'I'), strings]
+            sections += [_little_endian(getattr(portfolio, attr), typecode)
+                         for attr, typecode in Portfolio._columns]
+            sections += [_little_endian(portfolio._name_shares, 'q'),
+                         _little_endian(portfolio._name_values, 'd')]
+            for section in sections:
+                file.write(section)
+                file.write(bytes(_padding(len(section))))
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.remove(tmpname)
+        raise
+
+def read_snapshot_header(filename):
+    '''
+    Return (rows, mtime, size) from a snapshot file.
+    '''
+    with open(filename, 'rb') as file:
+        header = file.read(_SNAPSHOT_HEADER.size)
+    if len(header) < _SNAPSHOT_HEADER.size:
+        raise ValueError(f'{filename} is not a portfolio snapshot')
+    magic, version, _, rows, _, _, mtime, size, _, _ = _SNAPSHOT_HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f'{filename} is not a portfolio snapshot (version {SNAPSHOT_VERSION})')
+    return rows, mtime, size
+
+def read_snapshot(filename):
+    '''
+    Memory-map a snapshot written by write_snapshot() and return it as a
+    Portfolio.  The numeric columns are not copied or parsed.
+    '''
+    import mmap
+    read_snapshot_header(filename)
+    with open(filename, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    (_, _, _, rows, name_count, strings_size, _, _,
+     total_shares, total_value) = _SNAPSHOT_HEADER.unpack_from(data)
+
+    view = memoryview(data)
+    offset = _SNAPSHOT_HEADER.size
+    def section(typecode, count):
+        # The next count items, as a view of the file
+        nonlocal offset
+        nbytes = count * struct.calcsize(typecode)
+        if offset + nbytes > len(data):
+            raise ValueError(f'{filename} is truncated')
+        items = view[offset:offset + nbytes].cast(typecode)
+        offset += nbytes + _padding(nbytes)
+        if sys.byteorder == 'big' and typecode != 'B':
+            items = array(typecode, items)
+            items.byteswap()
+        return items
+
+    lengths = section('I', name_count).tolist()
+    strings = bytes(section('B', strings_size))
+    if sum(lengths) != len(strings):
+        raise ValueError(f'{filename} has a corrupt name table')
+    names = [ ]
+    start = 0
+    for length in lengths:
+        names.append(strings[start:start + length].decode())
+        start += length
+
+    portfolio = Portfolio()
+    portfolio._names = names
+    portfolio._name_ids = { name: index for index, name in enumerate(names) }
+    if len(portfolio._name_ids) != name_count:
+        raise ValueError(f'{filename} has a corrupt name table')
+    for attr, typecode in Portfolio._columns:
+        setattr(portfolio, attr, section(typecode, rows))
+    # Totals by name are small and updated in place, so they're lists
+    portfolio._name_shares = section('q', name_count).tolist()
+    portfolio._name_values = section('d', name_count).tolist()
+    portfolio._total_shares = total_shares
+    portfolio._total_value = total_value
+    return portfolio
+
+def read_portfolio_cached(filename, snapshot=None):
+    '''
+    Read a CSV file of name, shares, price data into a Portfolio, using
+    a snapshot file (filename + '.snap' by default) as a cache.  The
+    snapshot is used as long as the CSV file's mtime and size match the
+    ones recorded in it.  Otherwise the CSV file is parsed and the
+    snapshot rewritten.
+    '''
+    snapshot = snapshot or filename + '.snap'
+    st = os.stat(filename)
+    try:
+        _, mtime, size = read_snapshot_header(snapshot)
+        if (mtime, size) == (st.st_mtime_ns, st.st_size):
+            return read_snapshot(snapshot)
+    except (OSError, ValueError):
+        pass
+    portfolio = read_portfolio_blocks(filename)
+    try:
+        write_snapshot(portfolio, snapshot, source=filename)
+    except OSError:
+        pass                # Can't write the cache. Not fatal.
+    return portfolio
+
 # -----------------------------------------------------------------------------
 # Exercise 3: Data Abstraction
 #
@@ -111,6 +675,420 @@ class Holding:
 # would be provided to the make_report() function in report.py.
 
 class PandasPortfolio:
-    ...
+    '''
+    A portfolio backed by a pandas DataFrame with name, shares and price
+    columns.  If pandas isn't installed, a dict of NumPy arrays is used
+    instead.  Totals, sorting and filtering are done on whole columns.
+
+    Iteration produces Holding instances so make_report() works with it.
+    '''
+    def __init__(self, data):
+        if numpy is None:
+            raise ImportError('PandasPortfolio requires numpy')
+        self._data = data
+
+    @classmethod
+    def from_columns(cls, names, shares, prices):
+        columns = {
+            'name': numpy.asarray(names, dtype=object),
+            'shares': numpy.asarray(shares, dtype=numpy.int64),
+            'price': numpy.asarray(prices, dtype=numpy.float64),
+        }
+        return cls(pandas.DataFrame(columns) if pandas else columns)
+
+    @classmethod
+    def from_holdings(cls, holdings):
+        holdings = list(holdings)
+        return cls.from_columns([h.name for h in holdings],
+                                [h.shares for h in holdings],
+                                [h.price for h in holdings])
+
+    @classmethod
+    def from_csv(cls, filename):
+        if pandas:
+            # No NA parsing: NA, NULL, N/A, ... are perfectly good names
+            return cls(pandas.read_csv(filename, dtype={'name': object, 'shares': numpy.int64, 'price': numpy.float64},
+                                       keep_default_na=False, na_filter=False))
+        data = numpy.loadtxt(filename, delimiter=',', skiprows=1, ndmin=1,
+                             dtype=[('name', object), ('shares', numpy.int64), ('price', numpy.float64)])
+        return cls.from_columns(data['name'], data['shares'], data['price'])
+
+    def column(self, name):
+        '''
+        The named column as a NumPy array.
+        '''
+        return numpy.asarray(self._data[name])
+
+    def _take(self, index):
+        # New portfolio with the rows selected by index (array of positions or booleans)
+        if pandas:
+            return PandasPortfolio(self._data[index].reset_index(drop=True) if index.dtype == bool
+                                   else self._data.iloc[index].reset_index(drop=True))
+        return PandasPortfolio({ name: column[index] for name, column in self._data.items() })
+
+    def __len__(self):
+        return len(self._data['shares'])
+
+    def __iter__(self):
+        return map(Holding, self.column('name').tolist(), self.column('shares').tolist(),
+                   self.column('price').tolist())
+
+    def __repr__(self):
+        return f'<PandasPortfolio: {len(self)} holdings>'
+
+    @property
+    def value(self):
+        '''
+        Array with the value (shares * price) of every holding.
+        '''
+        return self.column('shares') * self.column('price')
+
+    def total_value(self):
+        return float(self.value.sum())
+
+    def total_shares(self):
+        return int(self.column('shares').sum())
+
+    def sort_by_value(self, reverse=False):
+        '''
+        New portfolio sorted by value.
+        '''
+        # Sorting the negated values keeps ties in their original order
+        # for reverse=True, just like sorted() does.
+        value = self.value
+        return self._take(numpy.argsort(-value if reverse else value, kind='stable'))
+
+    def top_by_value(self, n):
+        '''
+        New portfolio with the n most valuable holdings, largest first.
+        Same rows and order as sort_by_value(reverse=True)[:n], but only
+        the candidates are sorted.
+        '''
+        value = self.value
+        if n <= 0:
+            return self._take(numpy.arange(0, dtype=numpy.int64))
+        if n < len(value):
+            # Everything at least as large as the n-th largest value, in
+            # original order so ties still come out stable.
+            threshold = numpy.partition(value, len(value) - n)[len(value) - n]
+            candidates = numpy.flatnonzero(value >= threshold)
+        else:
+            candidates = numpy.arange(len(value))
+        order = numpy.argsort(-value[candidates], kind='stable')[:n]
+        return self._take(candidates[order])
+
+    def sort(self, key=None, reverse=False):
+        '''
+        Sort in place, like list.sort().  With no key, sorts by value
+        without looking at the rows one by one.
+        '''
+        if key is None:
+            self._data = self.sort_by_value(reverse)._data
+        else:
+            keys = [key(h) for h in self]
+            index = numpy.array(sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse), dtype=numpy.int64)
+            self._data = self._take(index)._data
+
+    def filter(self, mask):
+        '''
+        New portfolio with only the rows where mask (a boolean array) is
+        true.  For example: port.filter(port.value > 10000)
+        '''
+        return self._take(numpy.asarray(mask, dtype=bool))
+
+def read_portfolio_as_dataframe(filename):
+    return PandasPortfolio.from_csv(filename)
+
+# -----------------------------------------------------------------------------
+# Tests.  Run this file directly to check the readers above.
+
+def _write_data(text):
+    # Write text to a temporary file and return its name
+    import tempfile
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+        file.write(text)
+    return file.name
+
+def test_iter_portfolio():
+    text = 'name,shares,price\nAA,100,32.2\nIBM,50,91.1\nCAT,150,83.44\n'
+    filename = _write_data(text)
+    expected = [Holding('AA', 100, 32.2), Holding('IBM', 50, 91.1), Holding('CAT', 150, 83.44)]
+    try:
+        # Chunks that end in the middle of lines, in the header, ...
+        for chunk_size in [1, 2, 3, 7, 16, len(text), 1024]:
+            assert list(iter_portfolio(filename, chunk_size)) == expected, chunk_size
+        assert total_value(iter_portfolio(filename)) == total_value(expected)
+        assert total_shares(iter_portfolio(filename)) == 300
+    finally:
+        os.remove(filename)
+
+    # No newline at the end, blank lines, header only, empty file
+    for text, count in [('name,shares,price\nAA,100,32.2', 1),
+                        ('name,shares,price\nAA,100,32.2\n\nIBM,50,91.1\n\n', 2),
+                        ('name,shares,price\n', 0),
+                        ('name,shares,price', 0),
+                        ('', 0)]:
+        filename = _write_data(text)
+        try:
+            for chunk_size in [1, 5, 1024]:
+                assert len(list(iter_portfolio(filename, chunk_size))) == count, (text, chunk_size)
+        finally:
+            os.remove(filename)
+    print('Good iter_portfolio')
+
+def test_portfolio():
+    holdings = [Holding('AA', 100, 32.2), Holding('IBM', 50, 91.1), Holding('CAT', 150, 83.44),
+                Holding('AA', 10, 40.0)]
+    port = Portfolio(holdings)
+    rows = lambda p: [(h.name, h.shares, h.price) for h in p]
+    expected = rows(holdings)
+    assert len(port) == 4 and rows(port) == expected
+    assert rows([port[0], port[-1]]) == [expected[0], expected[-1]]
+    assert port.names() == ['AA', 'IBM', 'CAT', 'AA'] and list(port.shares) == [100, 50, 150, 10]
+    for index in [4, -5]:
+        try:
+            port[index]
+            assert False, 'expected IndexError'
+        except IndexError:
+            pass
+
+    # Slices are new portfolios
+    for index in [slice(1, 3), slice(None, None, -1), slice(None, None, 2), slice(10, 20)]:
+        part = port[index]
+        assert isinstance(part, Portfolio) and rows(part) == expected[index], index
+    part = port[1:]
+    part.append('GE', 95, 40.37)
+    assert len(port) == 4 and rows(part) == expected[1:] + [('GE', 95, 40.37)]
+    print('Good Portfolio')
+
+def test_parallel():
+    import random
+    random.seed(0)
+    lines = ['%s,%d,%.2f' % (random.choice(['AA', 'IBM', 'CAT', 'GE']), random.randint(1, 1000),
+                             random.uniform(1, 500)) for _ in range(1000)]
+    # One line much longer than a byte range, so several split points land in it
+    lines.insert(500, 'X' * 50000 + ',1,2.5')
+    filename = _write_data('name,shares,price\n' + '\n'.join(lines) + '\n')
+    rows = lambda p: (p.names(), list(p.shares), list(p.prices))
+    try:
+        expected = rows(read_portfolio_as_columns(filename))
+        for workers in [1, 2, 3, 8, 50]:
+            ranges = _byte_ranges(filename, workers)
+            assert all(hi == lo for (_, hi), (lo, _) in zip(ranges, ranges[1:]))
+            assert len(ranges) <= workers
+            assert rows(read_portfolio_parallel(filename, workers)) == expected, workers
+    finally:
+        os.remove(filename)
+    print('Good parallel loading')
+
+def test_blocks():
+    text = 'name,shares,price\n' + ''.join(f'N{i % 7},{i},{i / 4}\n' for i in range(500))
+    filename = _write_data(text)
+    rows = lambda p: [(h.name, h.shares, h.price) for h in p]
+    try:
+        expected = rows(iter_portfolio(filename))
+        for block_size in [1, 10, 100, 1024*1024]:
+            assert rows(read_portfolio_blocks(filename, block_size)) == expected, block_size
+    finally:
+        os.remove(filename)
+
+    # Blank lines are skipped, like iter_portfolio() does
+    for text, expected in [('name,shares,price\nAA,1,2.5\n\n', [('AA', 1, 2.5)]),
+                           ('name,shares,price\n\nAA,1,2.5\n\nBB,2,3.0', [('AA', 1, 2.5), ('BB', 2, 3.0)]),
+                           ('name,shares,price\n', []),
+                           ('', [])]:
+        filename = _write_data(text)
+        try:
+            assert rows(read_portfolio_blocks(filename)) == expected, text
+            assert rows(read_portfolio_blocks(filename, 1)) == expected, text
+        finally:
+            os.remove(filename)
+
+    # Lines with the wrong number of fields are errors, even if the
+    # total number of fields would work out
+    for text in ['name,shares,price\nAA,1,2,3\n4,5\n', 'name,shares,price\nAA,1\n',
+                 'name,shares,price\nAA,1,2.5\nBB\n']:
+        filename = _write_data(text)
+        try:
+            read_portfolio_blocks(filename)
+            assert False, f'expected ValueError for {text!r}'
+        except ValueError:
+            pass
+        finally:
+            os.remove(filename)
+    print('Good block loading')
+
+def test_snapshot():
+    import tempfile
+    rows = lambda p: [(h.name, h.shares, h.price) for h in p]
+    with tempfile.TemporaryDirectory() as dirname:
+        snapshot = os.path.join(dirname, 'test.snap')
+
+        # Round trip, including names that would trip up a separator
+        for names in [['AA', 'IBM', 'AA'], ['A\nB', 'C', 'A\nB'], [''], ['', 'x', ''], ['Åland', '株'], []]:
+            port = Portfolio(Holding(name, i + 1, i + 0.5) for i, name in enumerate(names))
+            write_snapshot(port, snapshot)
+            loaded = read_snapshot(snapshot)
+            assert rows(loaded) == rows(port) and loaded._names == port._names, names
+            assert (loaded.total_value(), loaded.total_shares()) == (port.total_value(), port.total_shares())
+
+        # Loaded snapshots can still be changed
+        loaded.append('GE', 95, 40.37)
+        assert rows(loaded) == rows(port) + [('GE', 95, 40.37)]
+
+        # Temporary files never stick around, even if writing fails
+        assert os.listdir(dirname) == ['test.snap']
+        broken = Portfolio([Holding('AA', 100, 32.2)])
+        broken._values = None
+        try:
+            write_snapshot(broken, snapshot)
+            assert False, 'expected TypeError'
+        except TypeError:
+            pass
+        assert os.listdir(dirname) == ['test.snap'] and len(read_snapshot(snapshot)) == len(port)
+
+        # Truncated files are errors
+        port = Portfolio([Holding('AA', 100, 32.2), Holding('IBM', 50, 91.1)])
+        write_snapshot(port, snapshot)
+        with open(snapshot, 'rb') as file:
+            data = file.read()
+        for size in [0, 10, _SNAPSHOT_HEADER.size, _SNAPSHOT_HEADER.size + 3, len(data) - 8]:
+            with open(snapshot, 'wb') as file:
+                file.write(data[:size])
+            try:
+                read_snapshot(snapshot)
+                assert False, f'expected ValueError at {size} bytes'
+            except ValueError:
+                pass
+
+        # The cache is rebuilt when the CSV file changes...
+        filename = os.path.join(dirname, 'test.csv')
+        with open(filename, 'w') as file:
+            file.write('name,shares,price\nAA,100,32.2\n')
+        cache = filename + '.snap'
+        assert rows(read_portfolio_cached(filename)) == [('AA', 100, 32.2)]
+        assert os.path.exists(cache)
+        port = read_portfolio_cached(filename)
+        assert isinstance(port.shares, memoryview) and rows(port) == [('AA', 100, 32.2)]
+        del port
+        with open(filename, 'w') as file:
+            file.write('name,shares,price\nAA,100,32.2\nIBM,50,91.1\n')
+        os.utime(filename, ns=(0, 10**9))
+        assert rows(read_portfolio_cached(filename)) == [('AA', 100, 32.2), ('IBM', 50, 91.1)]
+        assert read_snapshot_header(cache)[1:] == (10**9, os.path.getsize(filename))
+
+        # ...or when it's from an older version of the format
+        for version in [1, 2]:
+            with open(cache, 'r+b') as file:
+                file.seek(8)
+                file.write(struct.pack('<I', version))
+            try:
+                read_snapshot(cache)
+                assert False, 'expected ValueError'
+            except ValueError:
+                pass
+            assert len(read_portfolio_cached(filename)) == 2
+            assert read_snapshot_header(cache)[0] == 2
+    print('Good snapshots')
+
+def test_totals():
+    import random
+    import tempfile
+    random.seed(0)
+
+    def check(port):
+        # Running totals must agree with sums over the rows
+        holdings = list(port)
+        assert list(port.values) == [h.shares * h.price for h in holdings]
+        assert port.total_shares() == sum(h.shares for h in holdings)
+        assert abs(port.total_value() - sum(h.value for h in holdings)) < 1e-6
+        for name in set(port._names) | {'missing'}:
+            shares, value = port.name_totals(name)
+            assert shares == sum(h.shares for h in holdings if h.name == name), name
+            assert abs(value - sum(h.value for h in holdings if h.name == name)) < 1e-6, name
+
+    random_holding = lambda: Holding(random.choice('ABCDE'), random.randint(1, 100), random.randint(1, 10000) / 100)
+    port = Portfolio()
+    check(port)
+    for _ in range(50):
+        h = random_holding()
+        port.append(h.name, h.shares, h.price)
+    check(port)
+
+    # _extend() with a different name table, with and without precomputed totals
+    names = ['E', 'F', 'A']
+    name_ids = array('I', [random.randrange(3) for _ in range(30)])
+    shares = array('q', [random.randint(1, 100) for _ in range(30)])
+    prices = array('d', [random.randint(1, 10000) / 100 for _ in range(30)])
+    port._extend(names, name_ids, shares, prices)
+    check(port)
+    port._extend(names, name_ids, shares, prices, *_values_and_totals(3, name_ids, shares, prices))
+    check(port)
+
+    for index in [0, -1, 5, 17]:
+        holding = port.pop(index)
+        assert isinstance(holding, Holding)
+        check(port)
+    del port[3]
+    check(port)
+    check(port[10:40:3])
+
+    with tempfile.TemporaryDirectory() as dirname:
+        snapshot = os.path.join(dirname, 'test.snap')
+        write_snapshot(port, snapshot)
+        loaded = read_snapshot(snapshot)
+        check(loaded)
+        loaded.append('G', 10, 2.5)
+        check(loaded)
+        loaded = read_snapshot(snapshot)
+        loaded.pop(0)
+        check(loaded)
+
+    # Emptying the portfolio leaves no rounding error behind
+    while port:
+        port.pop()
+    assert (port.total_value(), port.total_shares()) == (0.0, 0)
+    check(port)
+
+    h = Holding('AA', 100, 32.2)
+    assert h.value == 3220.0000000000005
+    h.shares = 50
+    assert h.value == 1610.0000000000002
+    h.price = 2.0
+    assert h.value == 100.0
+    print('Good totals')
+
+def test_pandas_portfolio():
+    global pandas
+    if numpy is None:
+        return
+    import io
+    import contextlib
+    import report
+    names = ['NA', 'NULL', 'NAN', 'N/A', 'nan', 'None', 'AA']
+    text = 'name,shares,price\n' + ''.join(f'{name},{i + 1},{i + 0.5}\n' for i, name in enumerate(names))
+    filename = _write_data(text)
+    saved = pandas
+    try:
+        # With pandas and with the NumPy-only fallback
+        for pandas in {saved, None}:
+            port = PandasPortfolio.from_csv(filename)
+            assert list(port.column('name')) == names
+            assert [(h.name, h.shares, h.price) for h in port] == \
+                   [(h.name, h.shares, h.price) for h in iter_portfolio(filename)]
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                report.make_report(port)
+            assert ' NA ' in output.getvalue()
+    finally:
+        pandas = saved
+        os.remove(filename)
+    print('Good PandasPortfolio')
 
-    
+if __name__ == '__main__':
+    test_iter_portfolio()
+    test_portfolio()
+    test_parallel()
+    test_blocks()
+    test_snapshot()
+    test_totals()
+    test_pandas_portfolio()
@@ -28,28 +28,235 @@
 # Continue to `portfolio.py` to start the project.
 
 import portfolio
+import csv
+import heapq
+import io
+import json
 import os
+import re
 import sys
+from itertools import islice
+from operator import itemgetter
 
-def make_report(portfolio):
+def by_value(portfolio):
     '''
-    Print a report
+    Holdings sorted by value, largest first.  Portfolios that can sort
+    themselves more efficiently provide a sort_by_value() method.
     '''
-    portfolio.sort(key=lambda h: h.value, reverse=True)
-    print('{:>10} {:>10} {:>10} {:>10}'.format('name','shares','price','value'))
-    print(('-'*10 + ' ')*4)
+    if hasattr(portfolio, 'sort_by_value'):
+        return portfolio.sort_by_value(reverse=True)
+    return sorted(portfolio, key=lambda h: h.value, reverse=True)
+
+def top_by_value(portfolio, n):
+    '''
+    Return (holdings, total_value): the n most valuable holdings, largest
+    first, and the total value of the entire portfolio.  Makes a single
+    pass that keeps only n holdings in a heap, so any iterable works and
+    the cost is O(len(portfolio) log n) instead of a full sort.
+    Portfolios that can do better provide a top_by_value() method.
+    '''
+    if hasattr(portfolio, 'top_by_value'):
+        return portfolio.top_by_value(n), portfolio.total_value()
+
     total_value = 0.0
-    for holding in portfolio:
-        value = holding.shares*holding.price
-        total_value += value
-        print(f'{holding.name:>10s} {holding.shares:10d} {holding.price:10.2f} {value:10.2f}')
+    def values():
+        nonlocal total_value
+        for holding in portfolio:
+            value = holding.value
+            total_value += value
+            yield value, holding
+
+    rows = values()
+    top = heapq.nlargest(n, rows, key=itemgetter(0))
+    for _ in rows:              # nlargest() stops early when n <= 0
+        pass
+    return [holding for _, holding in top], total_value
+
+# Output formats.  Each one turns a batch of (name, shares, price, value)
+# rows into a single string, so the report goes out in a few large
+# writes rather than one print() per holding.
+
+class TextFormat:
+    def header(self):
+        return ('{:>10} {:>10} {:>10} {:>10}\n'.format('name','shares','price','value') +
+                ('-'*10 + ' ')*4 + '\n')
+
+    def rows(self, rows):
+        # %-formatting gives the same text as the f-string in the original
+        # make_report(), but is about twice as fast on tuples
+        return ''.join(['%10s %10d %10.2f %10.2f\n' % row for row in rows])
+
+    def footer(self, total_value):
+        return f'\nTotal value: {total_value:0.2f}\n'
+
+class CSVFormat:
+    def header(self):
+        return 'name,shares,price,value\n'
+
+    def rows(self, rows):
+        # Names almost never need quoting.  When none in the batch do,
+        # %-formatting writes the same text as csv.writer, only faster.
+        needs_quotes = self._needs_quotes
+        if any([needs_quotes(row[0]) for row in rows]):
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator='\n').writerows(rows)
+            return buffer.getvalue()
+        return ''.join(['%s,%d,%r,%r\n' % row for row in rows])
+
+    _needs_quotes = re.compile(r'[,"\r\n]').search
+
+    def footer(self, total_value):
+        return ''
+
+class JSONLinesFormat:
+    def header(self):
+        return ''
+
+    def rows(self, rows):
+        # Same output as json.dumps() on a dict, minus the per-row
+        # overhead.  repr() of a float is valid JSON (as long as it's finite).
+        string = json.encoder.encode_basestring_ascii
+        return ''.join([f'{{"name": {string(name)}, "shares": {shares}, "price": {price!r}, "value": {value!r}}}\n'
+                        for name, shares, price, value in rows])
 
-    print()
-    print(f'Total value: {total_value:0.2f}')
+    def footer(self, total_value):
+        return ''
+
+FORMATS = {
+    'text': TextFormat,
+    'csv': CSVFormat,
+    'jsonl': JSONLinesFormat,
+}
+
+def write_report(holdings, file, fmt='text', total_value=None, batch_size=10000):
+    '''
+    Write holdings to file in the given format, batch_size rows per
+    write() call.  holdings can be any iterable and is consumed as it
+    goes.  The text format ends with the total value, which is the sum
+    of the rows written unless total_value is given.
+    '''
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown report format {fmt!r} (expected one of {", ".join(FORMATS)})')
+    formatter = FORMATS[fmt]()
+    file.write(formatter.header())
+    shown_value = 0.0
+    holdings = iter(holdings)
+    while True:
+        rows = [(h.name, h.shares, h.price, h.value) for h in islice(holdings, batch_size)]
+        if not rows:
+            break
+        for row in rows:
+            shown_value += row[3]
+        file.write(formatter.rows(rows))
+    file.write(formatter.footer(shown_value if total_value is None else total_value))
+
+def make_report(portfolio, sort=True, top=None, fmt='text', file=None):
+    '''
+    Print a report.  portfolio can be any iterable of holdings, such as
+    the generator returned by portfolio.iter_portfolio().  With
+    sort=False the rows are printed as they arrive, so nothing is
+    held in memory.  With top=N only the N most valuable holdings are
+    printed (see top_by_value()), but the total covers all of them.
+    fmt is one of the FORMATS ('text', 'csv' or 'jsonl') and file is
+    where the report goes (sys.stdout by default).
+    '''
+    total_value = None
+    if top is not None:
+        portfolio, total_value = top_by_value(portfolio, top)
+    elif sort:
+        portfolio = by_value(portfolio)
+    write_report(portfolio, file or sys.stdout, fmt, total_value)
 
 def main(filename):
-    port = portfolio.read_portfolio_as_classes(filename)
+    port = portfolio.read_portfolio_cached(filename)
     make_report(port)
     
+def _sample_holdings():
+    # Lots of equal values so that tie order matters
+    import random
+    random.seed(0)
+    return [portfolio.Holding(f'N{i}', random.randint(1, 5), random.choice([1.0, 2.0, 2.5]))
+            for i in range(500)]
+
+def test_top_by_value():
+    import tempfile
+    holdings = _sample_holdings()
+    expected_total = sum(h.shares*h.price for h in holdings)
+    rows = lambda hs: [(h.name, h.shares, h.price) for h in hs]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+        file.write('name,shares,price\n')
+        file.writelines(f'{h.name},{h.shares},{h.price}\n' for h in holdings)
+    try:
+        sources = [('list', lambda: holdings),
+                   ('iterator', lambda: iter(holdings)),
+                   ('iter_portfolio', lambda: portfolio.iter_portfolio(file.name, 100)),
+                   ('Portfolio', lambda: portfolio.Portfolio(holdings))]
+        if portfolio.numpy:
+            sources.append(('PandasPortfolio', lambda: portfolio.PandasPortfolio.from_holdings(holdings)))
+        for title, source in sources:
+            for n in [0, 1, 2, 10, 137, 499, 500, 1000]:
+                top, total = top_by_value(source(), n)
+                assert rows(top) == rows(by_value(holdings)[:n]), (title, n)
+                assert abs(total - expected_total) < 1e-6, (title, n)
+    finally:
+        os.remove(file.name)
+    print('Good top_by_value')
+
+def test_write_report():
+    import contextlib
+    holdings = _sample_holdings()
+
+    # The text format is exactly what the original print() loop produced
+    expected = io.StringIO()
+    with contextlib.redirect_stdout(expected):
+        print('{:>10} {:>10} {:>10} {:>10}'.format('name','shares','price','value'))
+        print(('-'*10 + ' ')*4)
+        total_value = 0.0
+        for holding in by_value(holdings):
+            value = holding.shares*holding.price
+            total_value += value
+            print(f'{holding.name:>10s} {holding.shares:10d} {holding.price:10.2f} {value:10.2f}')
+        print()
+        print(f'Total value: {total_value:0.2f}')
+    report = io.StringIO()
+    with contextlib.redirect_stdout(report):
+        make_report(holdings)
+    assert report.getvalue() == expected.getvalue()
+
+    # Batches of any size give the same output
+    holdings.append(portfolio.Holding('Big, "Co"\u00e9', 3, 1.5))
+    rows = [(h.name, h.shares, h.price, h.value) for h in holdings]
+    for fmt in FORMATS:
+        outputs = set()
+        for batch_size in [1, 7, 100, len(holdings), 10000]:
+            file = io.StringIO()
+            write_report(iter(holdings), file, fmt, batch_size=batch_size)
+            outputs.add(file.getvalue())
+        assert len(outputs) == 1, fmt
+    file = io.StringIO()
+    write_report(holdings, file, 'text', batch_size=7)
+    assert file.getvalue().count('\n') == len(holdings) + 4
+
+    # CSV and JSON lines can be read back
+    file = io.StringIO()
+    write_report(holdings, file, 'csv', batch_size=7)
+    lines = list(csv.reader(io.StringIO(file.getvalue())))
+    assert lines[0] == ['name', 'shares', 'price', 'value']
+    assert [(name, int(shares), float(price), float(value)) for name, shares, price, value in lines[1:]] == rows
+    file = io.StringIO()
+    make_report(iter(holdings), sort=False, fmt='jsonl', file=file)
+    lines = [json.loads(line) for line in file.getvalue().splitlines()]
+    assert [(d['name'], d['shares'], d['price'], d['value']) for d in lines] == rows
+
+    try:
+        make_report(holdings, fmt='xml', file=io.StringIO())
+        assert False, 'expected ValueError'
+    except ValueError as e:
+        assert 'text, csv, jsonl' in str(e)
+    print('Good write_report')
+
 if __name__ == '__main__':
+    test_top_by_value()
+    test_write_report()
     main(os.path.join(os.path.dirname(sys.argv[0]),'portfolio.csv'))